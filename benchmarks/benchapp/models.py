@@ -0,0 +1,15 @@
+from django.db import models
+from dbparti.models import Partitionable
+
+
+class Event(Partitionable):
+    created = models.DateTimeField()
+    value = models.IntegerField()
+    message = models.CharField(max_length=255)
+
+    class Meta(Partitionable.Meta):
+        db_table = 'benchmark_event'
+        partition_type = 'range'
+        partition_subtype = 'date'
+        partition_range = 'day'
+        partition_column = 'created'
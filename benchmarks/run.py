@@ -0,0 +1,175 @@
+"""
+Benchmarks for insert, lookup and maintenance paths of partitioned tables.
+
+Runs against a local PostgreSQL or MySQL server, the benchmark table is dropped
+and recreated for every number of partitions, so don't point it to a database
+with valuable data. Results are written as a JSON document, e.g.:
+
+    $ python benchmarks/run.py --vendor postgresql --name benchmarks --partitions 1,10,100 --output results.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+from datetime import datetime, timedelta
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENGINES = {
+    'postgresql': 'django.db.backends.postgresql_psycopg2',
+    'mysql': 'django.db.backends.mysql',
+}
+
+
+def parse_options():
+    """Parses command line options"""
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('--vendor', choices=sorted(ENGINES), default='postgresql', help='Database vendor')
+    parser.add_option('--name', default='benchmarks', help='Database name')
+    parser.add_option('--user', default='', help='Database user')
+    parser.add_option('--password', default='', help='Database password')
+    parser.add_option('--host', default='', help='Database host')
+    parser.add_option('--port', default='', help='Database port')
+    parser.add_option('--mode', default='trigger', help='Partition mode for PostgreSQL: trigger or native')
+    parser.add_option('--partitions', default='1,10,100', help='Comma separated numbers of partitions')
+    parser.add_option('--rows', type='int', default=1000, help='Number of rows for insert benchmarks')
+    parser.add_option('--repeat', type='int', default=20, help='Number of repetitions for lookup benchmarks')
+    parser.add_option('--output', default=None, help='File to write results to, defaults to stdout')
+    return parser.parse_args()[0]
+
+
+def configure(options):
+    """Configures Django to use the given database and the benchmark app"""
+    from django.conf import settings
+
+    settings.configure(
+        DEBUG=False,
+        USE_TZ=False,
+        SECRET_KEY='benchmarks',
+        INSTALLED_APPS=['benchapp'],
+        DATABASES={'default': {
+            'ENGINE': ENGINES[options.vendor],
+            'NAME': options.name,
+            'USER': options.user,
+            'PASSWORD': options.password,
+            'HOST': options.host,
+            'PORT': options.port,
+        }},
+    )
+
+    try:
+        import django
+        django.setup()
+    except AttributeError:
+        pass
+
+
+def reset(model):
+    """Drops the benchmark table together with all its partitions and creates it again"""
+    from django.db import connection, transaction
+    from django.core.management import call_command
+    from django.core.management.base import CommandError
+    from dbparti.models import refresh_metadata
+
+    cursor = connection.cursor()
+    cascade = ' CASCADE' if connection.vendor == 'postgresql' else ''
+
+    for table in (model._meta.db_table, '{0}_unpartitioned'.format(model._meta.db_table)):
+        cursor.execute('DROP TABLE IF EXISTS {0}{1};'.format(table, cascade))
+
+    transaction.commit_unless_managed()
+
+    try:
+        call_command('syncdb', interactive=False, verbosity=0)
+    except CommandError:
+        call_command('migrate', run_syncdb=True, interactive=False, verbosity=0)
+
+    refresh_metadata()
+
+
+def measure(results, benchmark, partitions, operations, function):
+    """Runs the function once and records its timing"""
+    from django.db import connection
+
+    started = time.time()
+    function()
+    seconds = time.time() - started
+
+    results.append({
+        'benchmark': benchmark,
+        'vendor': connection.vendor,
+        'partitions': partitions,
+        'operations': operations,
+        'seconds': seconds,
+        'operations_per_second': operations / seconds if seconds else None,
+    })
+
+
+def run(options):
+    """Runs all benchmarks for every number of partitions"""
+    from benchapp.models import Event
+
+    Event._meta.partition_mode = options.mode
+    now = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    results = []
+
+    for partitions in [int(count) for count in options.partitions.split(',')]:
+        # Oldest day comes first, MySQL adds range partitions only from lower to higher values
+        days = [now - timedelta(days=day) for day in range(partitions - 1, -1, -1)]
+        reset(Event)
+
+        measure(results, 'prepare', partitions, 1, lambda: Event().get_partition().prepare())
+
+        # The first record of every day pays for the creation of its partition
+        measure(results, 'create_partition', partitions, partitions, lambda: [
+            Event(created=day, value=0, message='first').save() for day in days])
+
+        measure(results, 'exists', partitions, options.rows, lambda: [
+            Event.get_partition_for(days[row % partitions]).exists() for row in range(options.rows)])
+
+        measure(results, 'save', partitions, options.rows, lambda: [
+            Event(created=days[row % partitions], value=row, message='save').save() for row in range(options.rows)])
+
+        measure(results, 'bulk_create', partitions, options.rows, lambda: Event.objects.bulk_create([
+            Event(created=days[row % partitions], value=row, message='bulk') for row in range(options.rows)]))
+
+        if options.vendor == 'postgresql':
+            measure(results, 'copy_from', partitions, options.rows, lambda: Event.objects.copy_from(
+                (days[row % partitions], row, 'copy') for row in range(options.rows)))
+
+        for show in ('current', 'previous'):
+            measure(results, 'filter_{0}'.format(show), partitions, options.repeat, lambda: [
+                Event.objects.in_partition(show).count() for _ in range(options.repeat)])
+
+    return results
+
+
+def main():
+    options = parse_options()
+    configure(options)
+
+    import django
+    document = {
+        'started': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'vendor': options.vendor,
+        'mode': options.mode,
+        'rows': options.rows,
+        'results': run(options),
+    }
+
+    output = open(options.output, 'w') if options.output else sys.stdout
+
+    try:
+        json.dump(document, output, indent=2, sort_keys=True)
+        output.write('\n')
+    finally:
+        if options.output:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
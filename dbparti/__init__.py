@@ -1,12 +1,28 @@
-from django.db import connection, transaction
+from django.db import connections, DEFAULT_DB_ALIAS
 from dbparti.backends.exceptions import BackendError
 
 
-try:
-    backend = __import__('dbparti.backends.{0}'.format(connection.vendor), fromlist='*')
-except ImportError:
-    import pkgutil, os
-    raise BackendError(
-        allowed_values=[name for _, name, is_package in pkgutil.iter_modules(
-            [os.path.join(os.path.dirname(__file__), 'backends')]) if is_package]
-    )
+# Backend modules which were already loaded, keyed by database vendor
+loaded_backends = {}
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    """Returns partitioning backend for the database with the given alias"""
+    vendor = connections[using].vendor
+
+    try:
+        return loaded_backends[vendor]
+    except KeyError:
+        pass
+
+    try:
+        backend = loaded_backends[vendor] = __import__('dbparti.backends.{0}'.format(vendor), fromlist='*')
+    except ImportError:
+        import pkgutil, os
+        raise BackendError(
+            vendor=vendor,
+            allowed_values=[name for _, name, is_package in pkgutil.iter_modules(
+                [os.path.join(os.path.dirname(__file__), 'backends')]) if is_package]
+        )
+
+    return backend
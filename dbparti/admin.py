@@ -1,10 +1,78 @@
 from django.contrib import admin
-from dbparti import backend
-from dbparti.backends.exceptions import PartitionColumnError, PartitionFilterError
+from django.contrib.admin.views.main import ChangeList, IGNORED_PARAMS
+from django.core.paginator import Paginator
+from dbparti.backends.exceptions import PartitionColumnError
+
+
+class PartitionListFilter(admin.SimpleListFilter):
+    """Changelist filter which lists existing partitions with their estimated number of rows"""
+    title = 'partition'
+    parameter_name = 'partition'
+
+    def lookups(self, request, model_admin):
+        """Returns existing partitions, newest first, using a single metadata query"""
+        prefix = len(model_admin.opts.db_table) + 1
+
+        return [(partition['name'], '{0} (~{1} rows)'.format(partition['name'][prefix:], partition['rows']))
+                for partition in reversed(model_admin.get_partitions(request))]
+
+    def queryset(self, request, queryset):
+        """Limits records to the selected partition"""
+        if self.value() is None:
+            return queryset
+
+        return queryset.extra(where=queryset.model.get_partition_filter(self.value(), using=queryset.db).apply())
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator which takes number of records from the given estimate instead of running COUNT(*)"""
+    def __init__(self, object_list, per_page, estimated_count, **kwargs):
+        super(EstimatedCountPaginator, self).__init__(object_list, per_page, **kwargs)
+        self._count = self.estimated_count = estimated_count
+
+    @property
+    def count(self):
+        """Returns estimated number of records"""
+        return self.estimated_count
+
+
+class EstimatedCountChangeList(ChangeList):
+    """Changelist which takes numbers of records from the row estimates of the partitions instead of COUNT(*)"""
+    def get_results(self, request):
+        """Fetches results, the total number of records is estimated unless it is limited by partition_show"""
+        attribute = 'root_queryset' if hasattr(self, 'root_queryset') else 'root_query_set'
+        root_queryset = getattr(self, attribute)
+        request.dbparti_estimated_count = self.get_estimated_count(request)
+
+        if self.model_admin.partition_show == 'all':
+            full_count = sum(partition['rows'] or 0 for partition in self.model_admin.get_partitions(request))
+            estimated_queryset = root_queryset._clone()
+            estimated_queryset.count = lambda: full_count
+            setattr(self, attribute, estimated_queryset)
+
+        try:
+            super(EstimatedCountChangeList, self).get_results(request)
+        finally:
+            setattr(self, attribute, root_queryset)
+
+    def get_estimated_count(self, request):
+        """
+        Returns estimated number of the shown records if they are limited by nothing but PartitionListFilter,
+        otherwise returns None, because row estimates can't tell how many records match the search or other filters
+        """
+        params = dict((key, value) for key, value in self.params.items() if key not in IGNORED_PARAMS)
+        selected = params.pop(PartitionListFilter.parameter_name, None)
+
+        if params or self.query or self.model_admin.partition_show != 'all':
+            return None
+
+        return sum(partition['rows'] or 0 for partition in self.model_admin.get_partitions(request)
+                   if selected is None or partition['name'] == selected)
 
 
 class PartitionableAdmin(admin.ModelAdmin):
     partition_show = 'all'
+    partition_estimated_count = False
 
     def __init__(self, *args, **kwargs):
         super(PartitionableAdmin, self).__init__(*args, **kwargs)
@@ -16,23 +84,37 @@ class PartitionableAdmin(admin.ModelAdmin):
                 allowed_values=self.opts.get_all_field_names()
             )
 
-        try:
-            self.filter = getattr(backend.filters, '{0}PartitionFilter'.format(
-                self.opts.partition_type.capitalize()))(self.partition_show, **self.opts.__dict__)
-        except AttributeError:
-            import re
-            raise PartitionFilterError(
-                model=self.opts.__dict__['object_name'],
-                current_value=self.opts.partition_type,
-                allowed_values=[c.replace('PartitionFilter', '').lower() for c in dir(
-                    backend.filters) if re.match('\w+PartitionFilter', c) is not None and 'Base' not in c]
-            )
+        self.filter = self.model.get_partition_filter(self.partition_show)
 
     def queryset(self, request):
         """Determines data from what partitions should be shown in django admin"""
         qs = super(PartitionableAdmin, self).queryset(request)
 
         if self.partition_show != 'all':
-            qs = qs.extra(where=self.filter.apply())
+            qs = qs.extra(where=self.model.get_partition_filter(self.partition_show, using=qs.db).apply())
 
         return qs
+
+    def get_partitions(self, request):
+        """Returns existing partitions with their statistics, they are fetched only once per request"""
+        if not hasattr(request, 'dbparti_partitions'):
+            request.dbparti_partitions = self.model.get_partitions()
+
+        return request.dbparti_partitions
+
+    def get_changelist(self, request, **kwargs):
+        """Uses changelist which estimates numbers of records if partition_estimated_count is enabled"""
+        if self.partition_estimated_count:
+            return EstimatedCountChangeList
+
+        return super(PartitionableAdmin, self).get_changelist(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        """Uses row estimates of the partitions instead of COUNT(*) if the changelist could estimate the count"""
+        estimated_count = getattr(request, 'dbparti_estimated_count', None)
+
+        if not self.partition_estimated_count or estimated_count is None:
+            return super(PartitionableAdmin, self).get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
+        return EstimatedCountPaginator(queryset, per_page, estimated_count, orphans=orphans,
+                                       allow_empty_first_page=allow_empty_first_page)
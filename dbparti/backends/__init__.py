@@ -1,21 +1,88 @@
-from dbparti import connection, transaction
+import re
+import time
+import functools
+from django.conf import settings
+from django.utils import timezone
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from dbparti.signals import partition_operation, partition_filter_applied
 
 
-class BasePartition(object):
+def instrument(function, operation):
+    """Wraps operation, so that a signal with its timing is sent after it is finished"""
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        running = self.__dict__.setdefault('_running_operations', set())
+
+        # Operation which is called from the same operation of a parent class is reported only once
+        if operation in running:
+            return function(self, *args, **kwargs)
+
+        running.add(operation)
+        self.cache_hit, error, started = None, None, time.time()
+
+        try:
+            return function(self, *args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            running.discard(operation)
+            self._send_signal(operation, time.time() - started, error)
+
+    return wrapper
+
+
+class Instrumented(type):
+    """Instruments operations listed in the operations attribute of every class which defines them"""
+    def __new__(mcs, name, bases, attrs):
+        cls = super(Instrumented, mcs).__new__(mcs, name, bases, attrs)
+
+        for operation in cls.operations:
+            if operation in attrs:
+                setattr(cls, operation, instrument(attrs[operation], operation))
+
+        return cls
+
+
+InstrumentedBase = Instrumented('InstrumentedBase', (object,), {'operations': ()})
+
+
+class BasePartition(InstrumentedBase):
     """Base partition class for all backends. All backends should inherit from it."""
-    def __init__(self, column_value, column_type, **kwargs):
-        self.cursor = connection.cursor()
+    operations = ('prepare', 'prepare_online', 'exists', 'create', 'ensure', 'drop', 'migrate', 'copy', 'refresh_routing')
+    cache_hit = None
+
+    def __init__(self, column_value, column_type, using=DEFAULT_DB_ALIAS, **kwargs):
+        self.using = using
+        self.options = kwargs
+        self._cursor = None
         self.model = kwargs['object_name']
         self.table = kwargs['db_table']
         self.partition_pk = kwargs['pk']
         self.partition_column = kwargs['partition_column']
-        self.column_value = column_value
+        self.column_value = self._get_stored_value(column_value)
         self.column_type = column_type
 
+    @property
+    def cursor(self):
+        """Database cursor, acquired only when the first statement is about to run"""
+        if self._cursor is None:
+            self._cursor = connections[self.using].cursor()
+
+        return self._cursor
+
     def prepare(self):
         """Prepares everything that is needed to initialize partitioning"""
         raise NotImplementedError('Prepare method not implemented for partition type: {0}'.format(self.__class__.__name__))
 
+    def prepare_online(self, **kwargs):
+        """Prepares partitioning without long locks of the original table, backends which can't do it just prepare it"""
+        self.prepare()
+
+    def refresh_routing(self):
+        """Regenerates routing of records to the existing partitions, backends where the database routes them do nothing"""
+        pass
+
     def exists(self):
         """Checks if partition exists"""
         raise NotImplementedError('Exists method not implemented for partition type: {0}'.format(self.__class__.__name__))
@@ -24,6 +91,89 @@ class BasePartition(object):
         """Creates new partition"""
         raise NotImplementedError('Create method not implemented for partition type: {0}'.format(self.__class__.__name__))
 
+    def ensure(self):
+        """Creates partition ahead of time if it doesn't exist yet, even where the database creates partitions itself"""
+        if not self.exists():
+            self.create()
+
+    def migrate(self, **kwargs):
+        """Moves rows stored before partitioning was prepared into partitions, returns number of moved rows"""
+        raise NotImplementedError('Migrate method not implemented for partition type: {0}'.format(self.__class__.__name__))
+
+    def copy(self, columns, rows):
+        """Loads rows with values for the given columns directly into the partition"""
+        raise NotImplementedError('Copy method not implemented for partition type: {0}'.format(self.__class__.__name__))
+
+    def all(self):
+        """Returns names of all existing partitions"""
+        raise NotImplementedError('All method not implemented for partition type: {0}'.format(self.__class__.__name__))
+
+    def stats(self):
+        """
+        Returns all existing partitions with their bounds, estimated number of rows, size of the data and size of
+        the indexes in bytes as a list of dicts with name, bounds, rows, size and index_size keys
+        """
+        raise NotImplementedError('Stats method not implemented for partition type: {0}'.format(self.__class__.__name__))
+
+    def drop(self, detach=False):
+        """Drops partition or detaches it from the partitioned table and leaves it as a standalone table"""
+        raise NotImplementedError('Drop method not implemented for partition type: {0}'.format(self.__class__.__name__))
+
+    def get_names(self, values):
+        """Returns names of the partitions for a batch of partition column values, computed once for every distinct value"""
+        names = {}
+
+        for value in values:
+            if value not in names:
+                names[value] = self.__class__(value, self.column_type, using=self.using, **self.options)._get_name()
+
+        return [names[value] for value in values]
+
+    def get_partitions_for(self, values):
+        """
+        Returns names of the partitions for a batch of partition column values together with partition objects
+        by their names, names are computed for the whole batch and a partition object is built once per partition
+        """
+        names, partitions = self.get_names(values), {}
+
+        for name, value in zip(names, values):
+            if name not in partitions:
+                partitions[name] = self.__class__(value, self.column_type, using=self.using, **self.options)
+
+        return names, partitions
+
+    def _get_stored_value(self, value):
+        """
+        Returns partition column value as it is stored in the database. Aware datetimes are stored in UTC when time
+        zone support is enabled, so that partitions and their bounds are computed from UTC instead of local time
+        """
+        if settings.USE_TZ and getattr(value, 'tzinfo', None) is not None:
+            return timezone.make_naive(value, timezone.utc)
+
+        return value
+
+    def _send_signal(self, operation, duration, error):
+        """Sends partition_operation signal if anybody listens to it"""
+        if not partition_operation.receivers:
+            return
+
+        try:
+            name = self._get_name()
+        except Exception:
+            name = None
+
+        partition_operation.send(
+            sender=self.__class__,
+            operation=operation,
+            vendor=connections[self.using].vendor,
+            using=self.using,
+            table=self.table,
+            partition=name,
+            duration=duration,
+            cache_hit=self.cache_hit,
+            error=error,
+        )
+
     def _get_name(self):
         """Defines name for a new partition"""
         raise NotImplementedError('Name method not implemented for partition type: {0}'.format(self.__class__.__name__))
@@ -33,8 +183,10 @@ class BasePartition(object):
         raise NotImplementedError('Partition function method not implemented for partition type: {0}'.format(self.__class__.__name__))
 
 
-class BasePartitionFilter(object):
+class BasePartitionFilter(InstrumentedBase):
     """Base class for all filter types. All filter types should inherit from it."""
+    operations = ('apply',)
+
     def __init__(self, partition_show, **kwargs):
         self.partition_show = partition_show
         self.model = kwargs['object_name']
@@ -44,3 +196,22 @@ class BasePartitionFilter(object):
     def apply(self):
         """Contains a filter that needs to be applied to queryset"""
         raise NotImplementedError('Filter not implemented for type: {0}'.format(self.__class__.__name__))
+
+    def _parse_name(self, pattern):
+        """Returns the part of partition_show matched by the pattern group if partition_show is a partition name"""
+        match = re.match('^{0}_{1}$'.format(re.escape(self.table), pattern), str(self.partition_show))
+        return match.group(1) if match is not None else None
+
+    def _send_signal(self, operation, duration, error):
+        """Sends partition_filter_applied signal if anybody listens to it"""
+        if not partition_filter_applied.receivers:
+            return
+
+        partition_filter_applied.send(
+            sender=self.__class__,
+            vendor=self.__class__.__module__.split('.')[-2],
+            table=self.table,
+            partition_show=self.partition_show,
+            duration=duration,
+            error=error,
+        )
@@ -1,4 +1,4 @@
-from dbparti import connection
+from django.db import connection
 
 
 class BasePartitionError(Exception):
@@ -8,12 +8,13 @@ class BasePartitionError(Exception):
         self.model = kwargs.get('model', None)
         self.current_value = kwargs.get('current_value', None)
         self.allowed_values = kwargs.get('allowed_values', None)
+        self.vendor = kwargs.get('vendor', connection.vendor)
 
     def __str__(self):
         return self.message.format(
             model=self.model,
             current=self.current_value,
-            vendor=connection.vendor,
+            vendor=self.vendor,
             allowed=', '.join(list(self.allowed_values))
         )
 
@@ -72,6 +73,60 @@ class PartitionRangeSubtypeError(BasePartitionError):
         )
 
 
+class PartitionModeError(BasePartitionError):
+    """Unsupported partition mode"""
+    def __init__(self, **kwargs):
+        super(PartitionModeError, self).__init__(
+            'Unsupported partition mode "{current}" in "{model}" model, supported partition modes for "{vendor}" backend are: {allowed}',
+            **kwargs
+        )
+
+
+class PartitionValueError(BasePartitionError):
+    """Partition column value doesn't belong to any partition"""
+    def __init__(self, **kwargs):
+        super(PartitionValueError, self).__init__(
+            'Partition column value "{current}" in "{model}" model doesn\'t belong to any partition, supported values for "{vendor}" backend are: {allowed}',
+            **kwargs
+        )
+
+
+class PartitionReferenceError(BasePartitionError):
+    """Partitioned table is referenced by foreign keys"""
+    def __init__(self, **kwargs):
+        super(PartitionReferenceError, self).__init__(
+            'Table of "{model}" model is referenced by foreign keys from tables: {allowed}, they should be dropped before partitioning in "{current}" mode',
+            **kwargs
+        )
+
+
+class PartitionProvisioningError(BasePartitionError):
+    """Partition wasn't created in background in time"""
+    def __init__(self, **kwargs):
+        super(PartitionProvisioningError, self).__init__(
+            'Partition "{current}" in "{model}" model wasn\'t created in background in {allowed} seconds, the saving connection may hold locks on the partitioned table',
+            **kwargs
+        )
+
+
+class PartitionLockError(BasePartitionError):
+    """Lock which serializes partition creation wasn't acquired"""
+    def __init__(self, **kwargs):
+        super(PartitionLockError, self).__init__(
+            'Lock "{current}" which serializes partition creation in "{model}" model wasn\'t acquired in {allowed} seconds',
+            **kwargs
+        )
+
+
+class PartitionReplicaError(BasePartitionError):
+    """Database given as a replica doesn't replicate anything"""
+    def __init__(self, **kwargs):
+        super(PartitionReplicaError, self).__init__(
+            'Database "{current}" given as a replica while partitioning "{model}" model isn\'t a replica, its replication status is empty: {allowed}',
+            **kwargs
+        )
+
+
 class PartitionShowError(BasePartitionError):
     """Unsupported partition show type"""
     def __init__(self, **kwargs):
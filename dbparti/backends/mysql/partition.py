@@ -1,6 +1,15 @@
+import time
+from django.db import connections
+from django.utils import timezone
 from dbparti.backends import BasePartition, transaction
-from dbparti.backends.utilities import DateTimeUtil
-from dbparti.backends.exceptions import PartitionRangeSubtypeError, PartitionFunctionError
+from dbparti.backends.utilities import DateTimeUtil, IntegerUtil, registry, metadata, quote_value
+from dbparti.backends.exceptions import (
+    PartitionRangeSubtypeError,
+    PartitionFunctionError,
+    PartitionValueError,
+    PartitionLockError,
+    PartitionReplicaError
+)
 
 
 """
@@ -12,32 +21,337 @@ separate statement should be executed inside each self.cursor.execute().
 """
 class Partition(BasePartition):
     """Common methods for all partition types"""
+    lock_timeout = 60
+
     def prepare(self):
         """Converts original table to partitioned one"""
+        metadata.clear(self.using, self.table)
+
+        for statement in self._get_prepare_statements(self.table):
+            self.cursor.execute(statement)
+
+        transaction.commit_unless_managed(using=self.using)
+        registry.clear(self.using, self.table)
+
+    def prepare_online(self, chunk_size=10000, sleep=0, replicas=(), max_lag=None):
+        """
+        Converts original table to partitioned one without locking it for the whole conversion. Partitioned
+        shadow table is created, then triggers are installed on the original table to mirror every change to
+        the shadow table and existing rows are copied in chunks ordered by primary key. Every chunk is copied
+        in its own transaction and its last primary key value is saved, so that an interrupted conversion
+        continues from where it stopped when it is run again. After all rows are copied, tables are swapped
+        atomically and the original table is kept as {parent_table}_unpartitioned. Copying can be throttled
+        by sleeping between chunks and by waiting while replication lag of the given replicas is too high.
+        Until the tables are swapped, missing partitions are created in the shadow table, both for saved
+        records and for the current and the next period, so that triggers never meet a value without a partition
+        """
+        metadata.clear(self.using, self.table)
+        registry.clear(self.using, self.table)
+        shadow_table, progress_table = self._get_online_tables()
+        pk = self.partition_pk.column
+
+        # Saving processes create partitions in the shadow table as soon as both tables exist
+        self._acquire_lock()
+
+        try:
+            self.cursor.execute('CREATE TABLE IF NOT EXISTS {0} (last_pk VARCHAR(255));'.format(progress_table))
+            self.cursor.execute('SELECT last_pk FROM {0};'.format(progress_table))
+            row = self.cursor.fetchone()
+
+            if row is None:
+                self.cursor.execute('INSERT INTO {0} VALUES (NULL);'.format(progress_table))
+
+            self.cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s;
+            """, [shadow_table])
+
+            if not self.cursor.fetchone()[0]:
+                self.cursor.execute('CREATE TABLE {0} LIKE {1};'.format(shadow_table, self.table))
+
+                for statement in self._get_prepare_statements(shadow_table):
+                    self.cursor.execute(statement)
+
+            transaction.commit_unless_managed(using=self.using)
+        finally:
+            self._release_lock()
+
+        self._create_online_partitions(self._get_online_values())
+
+        columns = ', '.join('`{0}`'.format(column) for column in self._get_columns())
+        new_columns = ', '.join('NEW.`{0}`'.format(column) for column in self._get_columns())
+        triggers = {
+            'insert': 'REPLACE INTO {shadow_table} ({columns}) VALUES ({new_columns});',
+            'update': """BEGIN
+                DELETE FROM {shadow_table} WHERE {pk} = OLD.{pk};
+                REPLACE INTO {shadow_table} ({columns}) VALUES ({new_columns});
+            END;""",
+            'delete': 'DELETE FROM {shadow_table} WHERE {pk} = OLD.{pk};',
+        }
+
+        for event, body in sorted(triggers.items()):
+            self.cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.triggers WHERE trigger_schema = DATABASE() AND trigger_name = %s;
+            """, ['{0}_online_{1}'.format(self.table, event)])
+
+            if not self.cursor.fetchone()[0]:
+                self.cursor.execute("""
+                    CREATE TRIGGER {parent_table}_online_{event} AFTER {event} ON {parent_table} FOR EACH ROW {body}
+                """.format(
+                    parent_table=self.table,
+                    event=event,
+                    body=body.format(shadow_table=shadow_table, pk=pk, columns=columns, new_columns=new_columns),
+                ))
+
+        transaction.commit_unless_managed(using=self.using)
+
+        # Rows inserted after the triggers were installed are already mirrored to the shadow table
+        self.cursor.execute('SELECT MAX({0}) FROM {1};'.format(pk, self.table))
+        last, upper = row and row[0], self.cursor.fetchone()[0]
+
+        while upper is not None:
+            condition, params = ('{0} <= %s', [upper]) if last is None else ('{0} > %s AND {0} <= %s', [last, upper])
+            condition = condition.format(pk)
+
+            self.cursor.execute('SELECT {0} FROM {1} WHERE {2} ORDER BY {0} LIMIT 1 OFFSET {3};'.format(
+                pk, self.table, condition, chunk_size - 1), params)
+            row = self.cursor.fetchone()
+
+            if row is None:
+                self.cursor.execute('SELECT MAX({0}) FROM {1} WHERE {2};'.format(pk, self.table, condition), params)
+                row = self.cursor.fetchone()
+
+            if row is None or row[0] is None:
+                break
+
+            self.cursor.execute('INSERT IGNORE INTO {0} ({1}) SELECT {1} FROM {2} WHERE {3} AND {4} <= %s;'.format(
+                shadow_table, columns, self.table, condition, pk), params + [row[0]])
+            self.cursor.execute('UPDATE {0} SET last_pk = %s;'.format(progress_table), [row[0]])
+            transaction.commit_unless_managed(using=self.using)
+            last = row[0]
+
+            # Copying can last longer than a period, records of the new period are mirrored by triggers
+            self._create_online_partitions(self._get_upcoming_values())
+
+            if sleep:
+                time.sleep(sleep)
+
+            if max_lag is not None:
+                self._wait_for_replicas(replicas, max_lag)
+
+        # Partitions which are being created in the shadow table by saving processes should be created before the swap
+        self._acquire_lock()
+
+        try:
+            self.cursor.execute('RENAME TABLE {0} TO {0}_unpartitioned, {1} TO {0};'.format(self.table, shadow_table))
+
+            for event in sorted(triggers):
+                self.cursor.execute('DROP TRIGGER IF EXISTS {0}_online_{1};'.format(self.table, event))
+
+            self.cursor.execute('DROP TABLE IF EXISTS {0};'.format(progress_table))
+            transaction.commit_unless_managed(using=self.using)
+        finally:
+            self._release_lock()
+
+        registry.clear(self.using, self.table)
+
+    def exists(self):
+        """Checks if partition exists, asks the database only if partition isn't known to exist yet"""
+        name = self._get_name()
+
+        self.cache_hit = registry.contains(self.using, self.table, name)
+
+        if self.cache_hit:
+            return True
+
+        exists = self._exists_in_database(name)
+
+        if exists:
+            registry.add(self.using, self.table, name)
+
+        return exists
+
+    def create(self):
+        """
+        Creates new partition. Creation is serialized between all processes with a named lock of the table,
+        partition is created only if nobody else created it while we were waiting for the lock
+        """
+        name = self._get_name()
+        self._acquire_lock()
+
+        try:
+            if not self._exists_in_database(name):
+                self.cursor.execute(self._get_create_statement(self._get_partitioned_table()))
+                transaction.commit_unless_managed(using=self.using)
+        finally:
+            self._release_lock()
+
+        registry.add(self.using, self.table, name)
+
+    def all(self):
+        """Returns names of all existing partitions"""
+        return self._get_partition_names(self.table)
+
+    def migrate(self, **kwargs):
+        """Moves rows stored before partitioning was prepared. MySQL moves all rows when the table is altered"""
+        return 0
+
+    def stats(self):
+        """Returns all existing partitions with their bounds, row estimates and sizes, uses a single metadata query"""
         self.cursor.execute("""
+            SELECT partition_name, partition_method, partition_description, table_rows, data_length, index_length
+            FROM information_schema.partitions
+            WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+            ORDER BY partition_ordinal_position;
+        """, [self.table])
+
+        bounds = {'RANGE': 'VALUES LESS THAN ({0})', 'LIST': 'VALUES IN ({0})', 'LIST COLUMNS': 'VALUES IN ({0})'}
+
+        return [{
+            'name': name,
+            'bounds': bounds[method].format(description) if method in bounds else None,
+            'rows': rows,
+            'size': size,
+            'index_size': index_size,
+        } for name, method, description, rows, size, index_size in self.cursor.fetchall()]
+
+    def drop(self, detach=False):
+        """
+        Drops partition. If detach is set, partition's data is moved beforehand to a standalone
+        table with the partition's name by exchanging the partition with an empty copy of the table
+        """
+        name = self._get_name()
+        statements = ['ALTER TABLE {parent_table} DROP PARTITION {child_table};']
+
+        if detach:
+            statements = [
+                'CREATE TABLE {child_table} LIKE {parent_table};',
+                'ALTER TABLE {child_table} REMOVE PARTITIONING;',
+                'ALTER TABLE {parent_table} EXCHANGE PARTITION {child_table} WITH TABLE {child_table};',
+            ] + statements
+
+        for statement in statements:
+            self.cursor.execute(statement.format(child_table=name, parent_table=self.table))
+
+        transaction.commit_unless_managed(using=self.using)
+        registry.discard(self.using, self.table, name)
+
+    def _get_prepare_statements(self, table):
+        """Returns statements which convert the given table to partitioned one"""
+        return ["""
             -- We need to rebuild primary key for our partitioning to work
             ALTER table {parent_table} DROP PRIMARY KEY, add PRIMARY KEY ({pk}, {partition_column});
         """.format(
             pk=self.partition_pk.column,
-            parent_table=self.table,
+            parent_table=table,
             partition_column=self.partition_column,
-        ))
+        )]
 
-        transaction.commit_unless_managed()
+    def _get_create_statement(self, table):
+        """Returns statement which creates new partition in the given table"""
+        raise NotImplementedError('Create statement method not implemented for partition type: {0}'.format(self.__class__.__name__))
 
-    def exists(self):
-        """Checks if partition exists"""
+    def _get_online_values(self):
+        """Returns a partition column value for every partition which should be created before copying rows online"""
+        return []
+
+    def _get_upcoming_values(self):
+        """Returns a partition column value for every partition new records are expected to go to while rows are copied"""
+        return []
+
+    def _get_online_tables(self):
+        """Defines names of the shadow and progress tables used by online conversion"""
+        return '{0}_shadow'.format(self.table), '{0}_progress'.format(self.table)
+
+    def _get_partitioned_table(self):
+        """
+        Returns table which partitions are created in. While the table is converted online it isn't partitioned
+        yet, so partitions are created in the shadow table, which receives all changes until the tables are swapped
+        """
+        self.cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name IN (%s, %s);
+        """, list(self._get_online_tables()))
+
+        return self._get_online_tables()[0] if self.cursor.fetchone()[0] == 2 else self.table
+
+    def _create_online_partitions(self, values):
+        """Creates partitions for the given values in the shadow table exactly like saved records do"""
+        for value in values:
+            partition = self.__class__(value, self.column_type, using=self.using, **self.options)
+
+            if not partition.exists():
+                partition.create()
+
+    def _exists_in_database(self, name):
+        """Asks the database if partition with the given name exists, in the shadow table as well during online conversion"""
         self.cursor.execute("""
             SELECT EXISTS(
                 SELECT 1 FROM information_schema.partitions
-                WHERE table_name='{parent_table}' AND partition_name='{partition_name}');
-        """.format(
-            parent_table=self.table,
-            partition_name=self._get_name(),
-        ))
+                WHERE table_schema = DATABASE() AND table_name IN (%s, %s) AND partition_name = %s);
+        """, [self.table, self._get_online_tables()[0], name])
 
         return self.cursor.fetchone()[0]
 
+    def _get_lock_name(self):
+        """Defines name of the lock which serializes partition creation, MySQL allows up to 64 characters"""
+        return 'dbparti.{0}'.format(self.table)[:64]
+
+    def _acquire_lock(self):
+        """Acquires the lock which serializes partition creation, GET_LOCK returns 0 on timeout and NULL on error"""
+        self.cursor.execute('SELECT GET_LOCK(%s, %s);', [self._get_lock_name(), self.lock_timeout])
+
+        if self.cursor.fetchone()[0] != 1:
+            raise PartitionLockError(model=self.model, current_value=self._get_lock_name(), allowed_values=[str(self.lock_timeout)])
+
+    def _release_lock(self):
+        """Releases the lock which serializes partition creation"""
+        self.cursor.execute('SELECT RELEASE_LOCK(%s);', [self._get_lock_name()])
+        self.cursor.fetchone()
+
+    def _get_partition_names(self, table):
+        """Returns names of all partitions of the given table"""
+        self.cursor.execute("""
+            SELECT partition_name
+            FROM information_schema.partitions
+            WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+            ORDER BY partition_ordinal_position;
+        """, [table])
+
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def _get_columns(self):
+        """Returns names of all columns of the original table"""
+        self.cursor.execute("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s
+            ORDER BY ordinal_position;
+        """, [self.table])
+
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def _wait_for_replicas(self, replicas, max_lag):
+        """
+        Waits until replication lag of all the given replicas is not greater than the given number of seconds.
+        Lag is unknown while replication threads of a replica are stopped, copying waits until they are started again
+        """
+        for alias in replicas:
+            cursor = connections[alias].cursor()
+
+            while True:
+                cursor.execute('SHOW SLAVE STATUS;')
+                row = cursor.fetchone()
+
+                if row is None:
+                    raise PartitionReplicaError(model=self.model, current_value=alias, allowed_values=['SHOW SLAVE STATUS'])
+
+                columns = [column[0] for column in cursor.description]
+                lag = dict(zip(columns, row))['Seconds_Behind_Master']
+
+                if lag is not None and lag <= max_lag:
+                    break
+
+                time.sleep(1)
+
 
 class RangePartition(Partition):
     """Range partition type implementation"""
@@ -46,62 +360,128 @@ class RangePartition(Partition):
         self.partition_range = kwargs['partition_range']
         self.partition_subtype = kwargs['partition_subtype']
         self.datetime = DateTimeUtil(self.column_value, self.partition_range, model=self.model)
+        self.integer = IntegerUtil(self.column_value, self.partition_range, model=self.model)
 
-    def prepare(self):
-        """Converts original table to partitioned one"""
-        super(RangePartition, self).prepare()
-        self.datetime.now = None
+    def all(self):
+        """Returns names of all existing partitions, except the zero partition created by prepare()"""
+        return super(RangePartition, self).all()[1:]
 
-        self.cursor.execute("""
+    def stats(self):
+        """Returns all existing partitions with their bounds, row estimates and sizes, except the zero partition"""
+        return super(RangePartition, self).stats()[1:]
+
+    def _get_prepare_statements(self, table):
+        """Returns statements which convert the given table to partitioned one"""
+        return super(RangePartition, self)._get_prepare_statements(table) + ["""
             -- We need to create zero partition to speed up things due to the partitioning
             -- implementation in the early versions of MySQL database (see bug #49754)
             ALTER TABLE {parent_table} PARTITION BY RANGE ({function}({partition_column}))(
                 PARTITION {partition_pattern} VALUES LESS THAN (0)
             );
         """.format(
-            parent_table=self.table,
+            parent_table=table,
             partition_column=self.partition_column,
-            partition_pattern=self._get_name(),
+            partition_pattern=self._get_zero_name(),
             function=self._get_partition_function(),
-        ))
-
-        transaction.commit_unless_managed()
+        )]
 
-    def create(self):
-        """Creates new partition"""
-        self.cursor.execute("""
+    def _get_create_statement(self, table):
+        """Returns statement which creates new partition in the given table"""
+        return """
             ALTER TABLE {parent_table} ADD PARTITION (
-                PARTITION {child_table} VALUES LESS THAN ({function}('{period_end}') + {addition})
+                PARTITION {child_table} VALUES LESS THAN ({upper_bound})
             );
         """.format(
             child_table=self._get_name(),
-            parent_table=self.table,
-            function=self._get_partition_function(),
-            period_end=self.datetime.get_period()[1],
-            addition='86400' if self._get_column_type() == 'timestamp' else '1',
-        ))
+            parent_table=table,
+            upper_bound=self._get_subtype_method('upper_bound')(),
+        )
+
+    def _get_online_values(self):
+        """Returns a value for every partition between the lowest existing value and the next period or block"""
+        self.cursor.execute('SELECT MIN({0}), MAX({0}) FROM {1};'.format(self.partition_column, self.table))
+        return self._get_subtype_method('online_values')(*self.cursor.fetchone())
 
-        transaction.commit_unless_managed()
+    def _get_upcoming_values(self):
+        """Returns a value for every partition new records are expected to go to depending on the partition subtype"""
+        return self._get_subtype_method('upcoming_values')()
+
+    def _get_zero_name(self):
+        """Defines name of the zero partition, which contains all values that are less than zero"""
+        now, value = self.datetime.now, self.integer.value
+        self.datetime.now = self.integer.value = None
+
+        try:
+            return self._get_name()
+        finally:
+            self.datetime.now, self.integer.value = now, value
 
     def _get_name(self):
         """Dynamically defines new partition name depending on the partition subtype"""
+        return self._get_subtype_method('name')()
+
+    def get_names(self, values):
+        """Dynamically defines names of the partitions for a batch of values depending on the partition subtype"""
+        return self._get_subtype_method('batch_names')(values)
+
+    def _get_partition_function(self):
+        """Dynamically loads needed partition function depending on the partition subtype"""
+        return self._get_subtype_method('partition_function')()
+
+    def _get_subtype_method(self, method):
+        """Dynamically loads needed method implementation depending on the partition subtype"""
         try:
-            return getattr(self, '_get_{0}_name'.format(self.partition_subtype))()
+            return getattr(self, '_get_{0}_{1}'.format(self.partition_subtype, method))
         except AttributeError:
             import re
             raise PartitionRangeSubtypeError(
                 model=self.model,
                 current_value=self.partition_subtype,
-                allowed_values=[re.match('_get_(\w+)_name', c).group(1) for c in dir(
-                    self) if re.match('_get_\w+_name', c) is not None]
+                allowed_values=[re.match('_get_(\w+)_{0}$'.format(method), c).group(1) for c in dir(
+                    self) if re.match('_get_\w+_{0}$'.format(method), c) is not None]
             )
 
     def _get_date_name(self):
         """Defines name for a new partition for date partition subtype"""
         return '{0}_{1}'.format(self.table, self.datetime.get_name())
 
-    def _get_partition_function(self):
-        """Returns correct partition function depending on the MySQL column type"""
+    def _get_date_batch_names(self, values):
+        """Defines names of the partitions for a batch of values for date partition subtype, once for every distinct day"""
+        return ['{0}_{1}'.format(self.table, name) for name in self.datetime.get_names(
+            [self._get_stored_value(value) for value in values])]
+
+    def _get_date_upper_bound(self):
+        """Defines an expression which all values of the new partition are less than for date partition subtype"""
+        return "{function}('{period_end}') + {addition}".format(
+            function=self._get_partition_function(),
+            period_end=self.datetime.get_period()[1],
+            addition='86400' if self._get_column_type() == 'timestamp' else '1',
+        )
+
+    def _get_date_online_values(self, minimum, maximum):
+        """Returns a value for every period between the given values and the next period"""
+        following = DateTimeUtil(timezone.now(), self.partition_range, model=self.model).shift(1)
+        last = max(DateTimeUtil(value, self.partition_range).get_name() for value in (maximum or following, following))
+        value, values = minimum or following, []
+
+        while DateTimeUtil(value, self.partition_range).get_name() <= last:
+            values.append(value)
+            value = DateTimeUtil(value, self.partition_range, model=self.model).shift(1)
+
+        return values
+
+    def _get_date_upcoming_values(self):
+        """Returns a value for the current and the next period"""
+        now = timezone.now()
+        return [now, DateTimeUtil(now, self.partition_range, model=self.model).shift(1)]
+
+    def _get_date_partition_function(self):
+        """Returns correct partition function depending on the MySQL column type, resolved once per table"""
+        function = metadata.get(self.using, self.table, ('partition_function', self.partition_column))
+
+        if function is not None:
+            return function
+
         functions = {
             'date': 'TO_DAYS',
             'datetime': 'TO_DAYS',
@@ -111,16 +491,53 @@ class RangePartition(Partition):
         column_type = self._get_column_type()
 
         try:
-            return functions[column_type]
+            function = functions[column_type]
         except KeyError:
             raise PartitionFunctionError(current_value=column_type, allowed_values=functions.keys())
 
+        metadata.set(self.using, self.table, ('partition_function', self.partition_column), function)
+        return function
+
+    def _get_integer_name(self):
+        """Defines name for a new partition for integer partition subtype, values below zero belong to the zero partition"""
+        if self.integer.value is not None and self.integer.value < 0:
+            return self._get_zero_name()
+
+        return '{0}_{1}'.format(self.table, self.integer.get_name())
+
+    def _get_integer_batch_names(self, values):
+        """Defines names of the partitions for a batch of values for integer partition subtype"""
+        return super(RangePartition, self).get_names(values)
+
+    def _get_integer_upper_bound(self):
+        """Defines a value which all values of the new partition are less than for integer partition subtype"""
+        return self.integer.get_range()[1]
+
+    def _get_integer_online_values(self, minimum, maximum):
+        """Returns a value for every block between the given values and the next block, except the zero partition"""
+        size = self.integer.get_size()
+        return [block * size for block in range(max(minimum or 0, 0) // size, max(maximum or 0, 0) // size + 2)]
+
+    def _get_integer_upcoming_values(self):
+        """Returns nothing, blocks of new records can't be told without scanning the table, they are created on save"""
+        return []
+
+    def _get_integer_partition_function(self):
+        """Integer values are used by MySQL range partitioning as is, so no function is needed"""
+        return ''
+
     def _get_column_type(self):
         """
         We can't rely on self.column_type in MySQL, because Django uses only date
         and datetime types internally, but MySQL has an additional timestamp type
-        and we need to know that, otherwise we can apply incorrect partition function
+        and we need to know that, otherwise we can apply incorrect partition function.
+        Column type is resolved once per table and is cached until the metadata is refreshed
         """
+        column_type = metadata.get(self.using, self.table, ('column_type', self.partition_column))
+
+        if column_type is not None:
+            return column_type
+
         self.cursor.execute("""
             SELECT data_type
             FROM information_schema.columns
@@ -130,4 +547,88 @@ class RangePartition(Partition):
             partition_column=self.partition_column,
         ))
 
-        return self.cursor.fetchone()[0]
+        column_type = self.cursor.fetchone()[0]
+        metadata.set(self.using, self.table, ('column_type', self.partition_column), column_type)
+        return column_type
+
+
+class HashPartition(Partition):
+    """Hash partition type implementation, partition column should be of integer type"""
+    def __init__(self, *args, **kwargs):
+        super(HashPartition, self).__init__(*args, **kwargs)
+        self.partition_count = kwargs['partition_count']
+
+    def _get_prepare_statements(self, table):
+        """Returns statements which convert the given table to partitioned one with all partitions at once"""
+        return super(HashPartition, self)._get_prepare_statements(table) + ["""
+            ALTER TABLE {parent_table} PARTITION BY HASH ({partition_column}) PARTITIONS {partition_count} (
+                {partitions}
+            );
+        """.format(
+            parent_table=table,
+            partition_column=self.partition_column,
+            partition_count=self.partition_count,
+            partitions=', '.join('PARTITION {0}_p{1}'.format(self.table, remainder) for remainder in range(
+                self.partition_count)),
+        )]
+
+    def exists(self):
+        """Checks if partition exists. All partitions of this type are created by prepare()"""
+        return True
+
+    def create(self):
+        """Creates new partition. Not used for this type because all partitions are created by prepare()"""
+        pass
+
+    def _get_name(self):
+        """Defines name of the partition, MySQL puts a record to the partition number MOD(ABS(value), count)"""
+        return '{0}_p{1}'.format(self.table, abs(self.column_value) % self.partition_count)
+
+
+class ListPartition(Partition):
+    """List partition type implementation, partitions and their values are defined by partition_list setting"""
+    def __init__(self, *args, **kwargs):
+        super(ListPartition, self).__init__(*args, **kwargs)
+        self.partition_list = kwargs['partition_list']
+
+    def _get_prepare_statements(self, table):
+        """Returns statements which convert the given table to partitioned one with partitions for all the lists"""
+        return super(ListPartition, self)._get_prepare_statements(table) + ["""
+            ALTER TABLE {parent_table} PARTITION BY LIST COLUMNS ({partition_column}) (
+                {partitions}
+            );
+        """.format(
+            parent_table=table,
+            partition_column=self.partition_column,
+            partitions=', '.join(self._get_definition(key) for key in sorted(self.partition_list)),
+        )]
+
+    def _get_create_statement(self, table):
+        """Returns statement which creates new partition in the given table"""
+        return """
+            ALTER TABLE {parent_table} ADD PARTITION ({definition});
+        """.format(
+            parent_table=table,
+            definition=self._get_definition(self._get_key()),
+        )
+
+    def _get_name(self):
+        """Defines name of the partition which contains partition column value"""
+        return '{0}_{1}'.format(self.table, self._get_key())
+
+    def _get_key(self):
+        """Returns partition_list key of the list which contains partition column value"""
+        for key, values in self.partition_list.items():
+            if self.column_value in values:
+                return key
+
+        raise PartitionValueError(
+            model=self.model,
+            current_value=self.column_value,
+            allowed_values=[str(value) for values in self.partition_list.values() for value in values]
+        )
+
+    def _get_definition(self, key):
+        """Returns definition of the partition for the given partition_list key"""
+        return 'PARTITION {0}_{1} VALUES IN ({2})'.format(
+            self.table, key, ', '.join(quote_value(value) for value in self.partition_list[key]))
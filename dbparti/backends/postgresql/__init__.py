@@ -1 +1,3 @@
 __all__ = ('filters', 'partition')
+
+vendor = 'postgresql'
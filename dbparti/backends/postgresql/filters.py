@@ -1,6 +1,8 @@
+import numbers
+from django.utils import timezone
 from dbparti.backends import BasePartitionFilter
+from dbparti.backends.utilities import DateTimeUtil, IntegerUtil, quote_value
 from dbparti.backends.exceptions import (
-    PartitionRangeError,
     PartitionRangeSubtypeError,
     PartitionShowError
 )
@@ -33,39 +35,96 @@ class RangePartitionFilter(PartitionFilter):
             )
 
     def _get_date_filter(self):
-        """Contains a partition filter for date partition subtype"""
-        ranges = {
-            'year': [
-                "EXTRACT('year' FROM {0}.{1}) = EXTRACT('year' FROM {2})",
-            ],
-            'month': [
-                "EXTRACT('year' FROM {0}.{1}) = EXTRACT('year' FROM NOW())",
-                "EXTRACT('month' FROM {2}.{3}) = EXTRACT('month' FROM {4})",
-            ],
-            'week': [
-                "EXTRACT('year' FROM {0}.{1}) = EXTRACT('year' FROM NOW())",
-                "EXTRACT('week' FROM {2}.{3}) = EXTRACT('week' FROM {4})",
-            ],
-            'day': [
-                "EXTRACT('year' FROM {0}.{1}) = EXTRACT('year' FROM NOW())",
-                "EXTRACT('month' FROM {2}.{3}) = EXTRACT('month' FROM NOW())",
-                "EXTRACT('day' FROM {4}.{5}) = EXTRACT('day' FROM {6})",
-            ],
+        """
+        Contains a partition filter for date partition subtype. Partition column is compared with a
+        half-open range of the period, so that constraint exclusion can skip other partitions and
+        partition column index created for every partition can be used
+        """
+        shows = {
+            'current': 0,
+            'previous': -1,
         }
 
-        try:
-            show_range = ranges[self.partition_range]
-        except KeyError:
-            raise PartitionRangeError(model=self.model, current_value=self.partition_range, allowed_values=ranges.keys())
+        if self.partition_show in shows:
+            now = DateTimeUtil(timezone.now(), self.partition_range, model=self.model).shift(shows[self.partition_show])
+        else:
+            now = DateTimeUtil.from_name(self._parse_name('(y\d+\w*)'), self.partition_range)
 
-        shows = {
-            'current': 'NOW()',
-            'previous': "NOW() - '1 {0}'::interval",
-        }
+        if now is None:
+            raise PartitionShowError(
+                model=self.model, current_value=self.partition_show, allowed_values=list(shows.keys()) + ['partition name'])
+
+        start, end = DateTimeUtil(now, self.partition_range, model=self.model).get_range()
+
+        return [
+            "{0}.{1} >= '{2}'".format(self.table, self.partition_column, start),
+            "{0}.{1} < '{2}'".format(self.table, self.partition_column, end),
+        ]
+
+    def _get_integer_filter(self):
+        """Contains a partition filter for integer partition subtype, partition_show is a number of the block"""
+        name = self._parse_name('(in?\d+)')
+        block = self.partition_show if name is None else IntegerUtil.from_name(name)
+
+        if isinstance(block, bool) or not isinstance(block, numbers.Integral):
+            raise PartitionShowError(
+                model=self.model, current_value=self.partition_show, allowed_values=['any integer', 'partition name'])
+
+        size = IntegerUtil(None, self.partition_range, model=self.model).get_size()
+        start, end = IntegerUtil(block * size, size, model=self.model).get_range()
+
+        return [
+            "{0}.{1} >= {2}".format(self.table, self.partition_column, start),
+            "{0}.{1} < {2}".format(self.table, self.partition_column, end),
+        ]
+
+
+class HashPartitionFilter(PartitionFilter):
+    """Hash partition filter implementation, partition_show is a number or a name of the partition"""
+    def __init__(self, *args, **kwargs):
+        super(HashPartitionFilter, self).__init__(*args, **kwargs)
+        self.partition_count = kwargs['partition_count']
+        self.partition_mode = kwargs.get('partition_mode', 'trigger')
+
+    def apply(self):
+        """
+        Contains a partition filter for the partition with the given number. In trigger mode it repeats
+        the check constraint of the partition, so that constraint exclusion works. In native mode records
+        are checked with the same hash function PostgreSQL uses to route them
+        """
+        name = self._parse_name('p(\d+)')
+        remainder = self.partition_show if name is None else int(name)
+
+        if remainder not in range(self.partition_count):
+            raise PartitionShowError(
+                model=self.model,
+                current_value=self.partition_show,
+                allowed_values=[str(remainder) for remainder in range(self.partition_count)] + ['partition name']
+            )
+
+        if self.partition_mode == 'native':
+            return ["satisfies_hash_partition('{0}'::regclass, {1}, {2}, {0}.{3})".format(
+                self.table, self.partition_count, remainder, self.partition_column)]
+
+        return ['mod(abs({0}.{1}), {2}) = {3}'.format(self.table, self.partition_column, self.partition_count, remainder)]
+
+
+class ListPartitionFilter(PartitionFilter):
+    """List partition filter implementation, partition_show is a key of partition_list setting or a partition name"""
+    def __init__(self, *args, **kwargs):
+        super(ListPartitionFilter, self).__init__(*args, **kwargs)
+        self.partition_list = kwargs['partition_list']
+
+    def apply(self):
+        """Contains a partition filter for the list with the given key or for the partition with the given name"""
+        keys = dict(('{0}_{1}'.format(self.table, key), key) for key in self.partition_list)
 
         try:
-            show = shows[self.partition_show]
+            values = self.partition_list[keys.get(self.partition_show, self.partition_show)]
         except KeyError:
-            raise PartitionShowError(model=self.model, current_value=self.partition_show, allowed_values=shows.keys())
+            raise PartitionShowError(
+                model=self.model, current_value=self.partition_show, allowed_values=list(self.partition_list.keys()) + ['partition name'])
 
-        return [item.format(self.table, self.partition_column, show.format(self.partition_range)) for item in show_range]
+        # Percent signs should be escaped because filters are passed to QuerySet.extra()
+        return ['{0}.{1} IN ({2})'.format(
+            self.table, self.partition_column, ', '.join(quote_value(value) for value in values).replace('%', '%%'))]
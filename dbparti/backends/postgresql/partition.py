@@ -1,25 +1,207 @@
+import re
+import time
+from io import StringIO
 from dbparti.backends import BasePartition, transaction
+from dbparti.backends.utilities import DateTimeUtil, IntegerUtil, registry, metadata, quote_value, quote_copy_value
 from dbparti.backends.exceptions import (
     PartitionRangeError,
-    PartitionRangeSubtypeError
+    PartitionRangeSubtypeError,
+    PartitionModeError,
+    PartitionValueError,
+    PartitionReferenceError
 )
 
 
 """
 PostgreSQL partition backend.
 
-PostgreSQL supports partitioning via inheritance.
+PostgreSQL supports partitioning via inheritance, in that case new partitions
+are created and rows are routed by triggers at the database level ("trigger"
+mode, default). Starting from PostgreSQL 10 there is also native declarative
+partitioning, in that case rows are routed by the database itself and new
+partitions are created at the python level ("native" mode).
 """
 class Partition(BasePartition):
     """Common methods for all partition types"""
+    def __init__(self, *args, **kwargs):
+        super(Partition, self).__init__(*args, **kwargs)
+        self.partition_mode = kwargs.get('partition_mode', 'trigger')
+        self.partition_indexes = kwargs.get('partition_indexes', ())
+        self.partition_storage = kwargs.get('partition_storage', {})
+
     def prepare(self):
+        """Prepares partitioning depending on the partition mode"""
+        return self._get_mode_method('prepare')()
+
+    def exists(self):
+        """Checks if partition exists depending on the partition mode"""
+        return self._get_mode_method('exists')()
+
+    def create(self):
+        """Creates new partition depending on the partition mode"""
+        return self._get_mode_method('create')()
+
+    def ensure(self):
+        """Creates partition ahead of time depending on the partition mode, in trigger mode exactly like the trigger does"""
+        return self._get_mode_method('ensure')()
+
+    def all(self):
+        """Returns names of all existing partitions"""
+        self.cursor.execute("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = '{parent_table}'::regclass
+            ORDER BY child.relname;
+        """.format(
+            parent_table=self.table,
+        ))
+
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def stats(self):
+        """Returns all existing partitions with their bounds, row estimates and sizes, uses a single metadata query"""
+        bounds = {
+            'native': 'pg_get_expr(child.relpartbound, child.oid)',
+            'trigger': """(
+                SELECT string_agg(pg_get_constraintdef(pg_constraint.oid), ' AND ')
+                FROM pg_constraint
+                WHERE pg_constraint.conrelid = child.oid AND pg_constraint.contype = 'c'
+            )""",
+        }
+
+        self.cursor.execute("""
+            SELECT
+                child.relname,
+                {bounds},
+                greatest(child.reltuples, 0)::bigint,
+                pg_table_size(child.oid),
+                pg_indexes_size(child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = '{parent_table}'::regclass
+            ORDER BY child.relname;
+        """.format(
+            bounds=bounds.get(self.partition_mode, 'NULL'),
+            parent_table=self.table,
+        ))
+
+        return [{
+            'name': name,
+            'bounds': bound,
+            'rows': rows,
+            'size': size,
+            'index_size': index_size,
+        } for name, bound, rows, size, index_size in self.cursor.fetchall()]
+
+    def drop(self, detach=False):
+        """Drops partition or detaches it from the partitioned table depending on the partition mode"""
+        self._get_mode_method('drop')(detach)
+        transaction.commit_unless_managed(using=self.using)
+        registry.discard(self.using, self.table, self._get_name())
+
+    def migrate(self, chunk_size=10000, sleep=0):
+        """
+        Moves rows which were stored before partitioning was prepared into the partitions. In trigger mode
+        such rows are left in the master table, in native mode they are left in {parent_table}_unpartitioned
+        table. Rows are moved in chunks ordered by primary key, each chunk in its own transaction, so that
+        locks are held only for a short time and an interrupted migration continues with the rows which are
+        still left. Missing partitions are created the same way as for new records. Returns number of moved rows
+        """
+        source = self._get_mode_method('migration_source')()
+        pk = self.partition_pk.column
+        last, moved = None, 0
+
+        if source is None:
+            return moved
+
+        while True:
+            condition, params = ('', []) if last is None else ('WHERE {0} > %s'.format(pk), [last])
+            self.cursor.execute('SELECT {pk}, {partition_column} FROM {source} {condition} ORDER BY {pk} LIMIT {limit};'.format(
+                pk=pk,
+                partition_column=self.partition_column,
+                source=source,
+                condition=condition,
+                limit=chunk_size,
+            ), params)
+            rows = self.cursor.fetchall()
+
+            if not rows:
+                break
+
+            partitions = self.get_partitions_for([row[1] for row in rows])[1]
+
+            for partition in partitions.values():
+                if not partition.exists():
+                    partition.create()
+
+            # Rows are inserted through the parent table, so they are routed exactly like new records
+            self.cursor.execute("""
+                WITH moved AS (
+                    DELETE FROM {source} WHERE {pk} = ANY(%s) RETURNING *
+                )
+                INSERT INTO {parent_table} SELECT * FROM moved;
+            """.format(
+                pk=pk,
+                source=source,
+                parent_table=self.table,
+            ), [[row[0] for row in rows]])
+
+            transaction.commit_unless_managed(using=self.using)
+            last, moved = rows[-1][0], moved + len(rows)
+
+            if sleep:
+                time.sleep(sleep)
+
+        return moved
+
+    def copy(self, columns, rows):
+        """
+        Loads rows directly into the partition with COPY, bypassing the before insert trigger. Partition
+        is created first if it doesn't exist yet, the same way the trigger or create() would create it
+        """
+        self._get_mode_method('ensure')()
+        data = StringIO()
+
+        for row in rows:
+            data.write(u'\t'.join(quote_copy_value(value) for value in row) + u'\n')
+
+        data.seek(0)
+        self.cursor.copy_expert('COPY {table} ({columns}) FROM STDIN;'.format(
+            table=self._get_copy_table(),
+            columns=', '.join(columns),
+        ), data)
+
+    def refresh_routing(self):
+        """
+        Regenerates the before insert function with static branches for all existing child tables, so that
+        records are routed without dynamic SQL. Records for unknown partitions still go through the dynamic
+        path which creates the partition. Natively partitioned tables are routed by PostgreSQL itself
+        """
+        if self.partition_mode != 'trigger':
+            return
+
+        self.cursor.execute(self._get_insert_function_statement(self._get_static_branches()))
+        transaction.commit_unless_managed(using=self.using)
+
+    def _get_mode_method(self, operation):
+        """Dynamically loads needed operation implementation depending on the partition mode"""
+        try:
+            return getattr(self, '_{0}_{1}'.format(operation, self.partition_mode))
+        except AttributeError:
+            import re
+            raise PartitionModeError(
+                model=self.model,
+                current_value=self.partition_mode,
+                allowed_values=[re.match('_prepare_(\w+)', c).group(1) for c in dir(
+                    self) if re.match('_prepare_\w+', c) is not None]
+            )
+
+    def _prepare_trigger(self):
         """Prepares needed triggers and functions for those triggers"""
         self.cursor.execute("""
             -- We need to create a before insert function
-            CREATE OR REPLACE FUNCTION {parent_table}_insert_child()
-            RETURNS TRIGGER AS $$
-                {partition_function}
-            $$ LANGUAGE plpgsql;
+            {insert_function}
 
             -- Then we create a trigger which calls the before insert function
             DO $$
@@ -62,19 +244,308 @@ class Partition(BasePartition):
         """.format(
             pk=self.partition_pk.column,
             parent_table=self.table,
-            partition_function=self._get_partition_function()
+            insert_function=self._get_insert_function_statement(),
         ))
 
-        transaction.commit_unless_managed()
+        transaction.commit_unless_managed(using=self.using)
 
-    def exists(self):
-        """Checks if partition exists. Not used in this backend because everything is done at the database level"""
+    def _get_insert_function_statement(self, static_branches=''):
+        """Defines statement which creates or replaces the before insert function"""
+        return """
+            CREATE OR REPLACE FUNCTION {parent_table}_insert_child()
+            RETURNS TRIGGER AS $$
+                {partition_function}
+            $$ LANGUAGE plpgsql;
+        """.format(
+            parent_table=self.table,
+            partition_function=self._get_partition_function(static_branches),
+        )
+
+    def _get_static_branches(self):
+        """
+        Defines IF/ELSIF branches which insert records directly into the existing child tables, newest first.
+        Static statements are planned once per session, unlike the dynamic EXECUTE used for unknown partitions
+        """
+        branches = []
+
+        for name in reversed(self.all()):
+            value = self._get_name_value(name[len(self.table) + 1:])
+
+            if value is None:
+                continue
+
+            partition = self.__class__(value, self.column_type, using=self.using, **self.options)
+            branches.append("""
+                {condition} {check_constraint} THEN
+                    INSERT INTO {child_table} VALUES (NEW.*);
+                    RETURN NEW;
+            """.format(
+                condition='ELSIF' if branches else 'IF',
+                check_constraint=partition._get_check_constraint('NEW.{0}'.format(self.partition_column)),
+                child_table=name,
+            ))
+
+        if not branches:
+            return ''
+
+        return '-- Static routing of the existing partitions' + ''.join(branches) + 'END IF;'
+
+    def _exists_trigger(self):
+        """Checks if partition exists. Not used in trigger mode because everything is done at the database level"""
         return True
 
-    def create(self):
-        """Creates new partition. Not used in this backend because everything is done at the database level"""
+    def _create_trigger(self):
+        """Creates new partition. Not used in trigger mode because everything is done at the database level"""
         pass
 
+    def _drop_trigger(self, detach):
+        """
+        Drops child table or removes it from the inheritance hierarchy of the parent table. Static routing
+        is regenerated without this child table, otherwise its records would still be inserted into it
+        """
+        statement = 'ALTER TABLE {child_table} NO INHERIT {parent_table};' if detach else 'DROP TABLE IF EXISTS {child_table};'
+        self.cursor.execute(statement.format(child_table=self._get_name(), parent_table=self.table))
+
+        if self._has_static_routing():
+            self.cursor.execute(self._get_insert_function_statement(self._get_static_branches()))
+
+    def _has_static_routing(self):
+        """Checks if the before insert function was generated with static branches by refresh_routing()"""
+        self.cursor.execute("""
+            SELECT bool_or(position('-- Static routing' IN prosrc) > 0) FROM pg_proc WHERE proname = '{parent_table}_insert_child';
+        """.format(
+            parent_table=self.table,
+        ))
+
+        return bool(self.cursor.fetchone()[0])
+
+    def _migration_source_trigger(self):
+        """Returns table which contains rows stored before partitioning was prepared, that is the master table itself"""
+        return 'ONLY {0}'.format(self.table)
+
+    def _ensure_trigger(self):
+        """Creates child table exactly like the before insert function does, if it isn't known to exist yet"""
+        name = self._get_name()
+
+        self.cache_hit = registry.contains(self.using, self.table, name)
+
+        if self.cache_hit:
+            return
+
+        self.cursor.execute("""
+            DO $$
+            DECLARE tablename TEXT := '{child_table}';
+            BEGIN
+                {child_table_statement}
+            END $$;
+        """.format(
+            child_table=name,
+            child_table_statement=self._get_child_table_statement(self._get_check_constraint().replace("'", "''")),
+        ))
+
+        transaction.commit_unless_managed(using=self.using)
+        registry.add(self.using, self.table, name)
+
+    def _prepare_native(self):
+        """
+        Converts original table to natively partitioned one. Declarative partitioning can only be
+        defined when the table is created, so original table is renamed to {parent_table}_unpartitioned
+        and the new partitioned table is created in its place with the same columns and defaults.
+        Rows which already existed in the original table are left in the renamed table. Renaming would
+        also move foreign keys of other tables to the renamed table, so such tables are refused
+        """
+        self.cursor.execute("""
+            SELECT conrelid::regclass::text
+            FROM pg_constraint
+            WHERE confrelid = '{parent_table}'::regclass AND conrelid <> confrelid AND contype = 'f'
+            AND NOT EXISTS(SELECT 1 FROM pg_partitioned_table WHERE partrelid = '{parent_table}'::regclass)
+            ORDER BY 1;
+        """.format(
+            parent_table=self.table,
+        ))
+
+        referencing = [row[0] for row in self.cursor.fetchall()]
+
+        if referencing:
+            raise PartitionReferenceError(model=self.model, current_value=self.partition_mode, allowed_values=referencing)
+
+        self.cursor.execute("""
+            DO $$
+            BEGIN
+            IF NOT EXISTS(
+                SELECT 1
+                FROM pg_partitioned_table
+                WHERE partrelid = '{parent_table}'::regclass
+            ) THEN
+                ALTER TABLE {parent_table} RENAME TO {parent_table}_unpartitioned;
+
+                CREATE TABLE {parent_table} (
+                    LIKE {parent_table}_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+                ) PARTITION BY {partition_key};
+
+                -- Primary keys on partitioned tables are supported only since PostgreSQL 11
+                IF current_setting('server_version_num')::integer >= 110000 THEN
+                    ALTER TABLE {parent_table} ADD PRIMARY KEY ({pk}, {partition_column});
+                END IF;
+
+                -- Sequence should belong to the new table, otherwise it will be dropped with the old one
+                IF pg_get_serial_sequence('{parent_table}_unpartitioned', '{pk}') IS NOT NULL THEN
+                    EXECUTE 'ALTER SEQUENCE ' || pg_get_serial_sequence('{parent_table}_unpartitioned', '{pk}')
+                        || ' OWNED BY {parent_table}.{pk};';
+                END IF;
+            END IF;
+            END $$;
+        """.format(
+            pk=self.partition_pk.column,
+            parent_table=self.table,
+            partition_column=self.partition_column,
+            partition_key=self._get_partition_key(),
+        ))
+
+        transaction.commit_unless_managed(using=self.using)
+        registry.clear(self.using, self.table)
+
+    def _exists_native(self):
+        """Checks if partition exists, asks the database only if partition isn't known to exist yet"""
+        name = self._get_name()
+
+        self.cache_hit = registry.contains(self.using, self.table, name)
+
+        if self.cache_hit:
+            return True
+
+        self.cursor.execute("SELECT to_regclass('{partition_name}') IS NOT NULL;".format(partition_name=name))
+        exists = self.cursor.fetchone()[0]
+
+        if exists:
+            registry.add(self.using, self.table, name)
+
+        return exists
+
+    def _create_native(self):
+        """
+        Creates new partition together with an index on partition column and indexes from partition_indexes,
+        concurrent creation of the same partition is serialized with an advisory lock and DDL is idempotent
+        """
+        self.cursor.execute("""
+            SELECT pg_advisory_xact_lock(hashtext('{parent_table}'), hashtext('{child_table}'));
+            CREATE TABLE IF NOT EXISTS {child_table} PARTITION OF {parent_table} FOR VALUES {partition_bounds}{storage};
+            {indexes}
+        """.format(
+            child_table=self._get_name(),
+            parent_table=self.table,
+            partition_bounds=self._get_partition_bounds(),
+            storage=self._get_storage_clause(),
+            indexes=self._get_index_statements(self._get_name()),
+        ))
+
+        transaction.commit_unless_managed(using=self.using)
+        registry.add(self.using, self.table, self._get_name())
+
+    def _ensure_native(self):
+        """Creates partition if it doesn't exist yet"""
+        if not self._exists_native():
+            self._create_native()
+
+    def _drop_native(self, detach):
+        """Drops partition or detaches it from the natively partitioned table"""
+        statement = 'ALTER TABLE {parent_table} DETACH PARTITION {child_table};' if detach else 'DROP TABLE IF EXISTS {child_table};'
+        self.cursor.execute(statement.format(child_table=self._get_name(), parent_table=self.table))
+
+    def _migration_source_native(self):
+        """Returns table which contains rows stored before partitioning was prepared, if it still exists"""
+        self.cursor.execute("SELECT to_regclass('{0}_unpartitioned') IS NOT NULL;".format(self.table))
+        return '{0}_unpartitioned'.format(self.table) if self.cursor.fetchone()[0] else None
+
+    def _get_copy_table(self):
+        """Defines table which rows are copied into"""
+        return self._get_name()
+
+    def _get_indexes(self):
+        """Returns name suffix and column list of every index which should be created for a new partition"""
+        columns = [self.partition_column] + [
+            ', '.join(index) if isinstance(index, (list, tuple)) else index for index in self.partition_indexes]
+
+        return [(re.sub('\W+', '_', column).strip('_'), column) for column in columns]
+
+    def _get_index_statements(self, child_table):
+        """Defines statements which create all indexes of the given partition of the natively partitioned table"""
+        return '\n'.join('CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({2});'.format(
+            child_table, suffix, columns) for suffix, columns in self._get_indexes())
+
+    def _get_trigger_index_statements(self):
+        """Defines statements of the before insert function which create all indexes of a new child table"""
+        return '\n'.join("EXECUTE 'CREATE INDEX ' || tablename || '_{0} ON ' || tablename || ' ({1});';".format(
+            suffix, columns.replace("'", "''")) for suffix, columns in self._get_indexes())
+
+    def _get_child_table_statement(self, check_constraint):
+        """
+        Defines statements which create child table named by the tablename variable together with its indexes,
+        if it doesn't exist yet. Check constraint is an expression of the dynamic CREATE TABLE statement.
+        to_regclass() is given a cstring and indexes are created only after the table check under the lock,
+        so that PostgreSQL 9.4 is enough
+        """
+        return """
+                IF to_regclass(tablename::cstring) IS NULL THEN
+                    -- Concurrent inserts wait here until the child table is created and committed
+                    PERFORM pg_advisory_xact_lock(hashtext('{parent_table}'), hashtext(tablename));
+
+                    IF to_regclass(tablename::cstring) IS NULL THEN
+                        EXECUTE 'CREATE TABLE ' || tablename || ' (
+                            CHECK ({check_constraint})
+                        ) INHERITS ({parent_table}){storage};';
+
+                        {indexes}
+                    END IF;
+                END IF;
+        """.format(
+            parent_table=self.table,
+            check_constraint=check_constraint,
+            storage=self._get_storage_clause().replace("'", "''"),
+            indexes=self._get_trigger_index_statements(),
+        )
+
+    def _get_routing_statement(self, check_constraint):
+        """Defines statements of the before insert function which insert the record into the child table named by the tablename variable"""
+        return """
+                {child_table_statement}
+
+                EXECUTE 'INSERT INTO ' || tablename || ' VALUES (($1).*);' USING NEW;
+                RETURN NEW;
+        """.format(
+            child_table_statement=self._get_child_table_statement(check_constraint),
+        )
+
+    def _get_storage_clause(self):
+        """Defines storage parameters and tablespace of a new partition from partition_storage setting"""
+        parameters = dict(self.partition_storage)
+        tablespace = parameters.pop('tablespace', None)
+        clause = ''
+
+        if parameters:
+            clause += ' WITH ({0})'.format(', '.join('{0} = {1}'.format(key, value) for key, value in sorted(parameters.items())))
+
+        if tablespace is not None:
+            clause += ' TABLESPACE {0}'.format(tablespace)
+
+        return clause
+
+    def _get_name_value(self, name):
+        """Returns a partition column value which belongs to the partition with the given name without table prefix"""
+        raise NotImplementedError('Name value method not implemented for partition type: {0}'.format(self.__class__.__name__))
+
+    def _get_check_constraint(self, column=None):
+        """Defines check constraint of the child table in trigger mode for the given column expression"""
+        raise NotImplementedError('Check constraint method not implemented for partition type: {0}'.format(self.__class__.__name__))
+
+    def _get_partition_key(self):
+        """Defines partition key of the natively partitioned table"""
+        raise NotImplementedError('Partition key method not implemented for partition type: {0}'.format(self.__class__.__name__))
+
+    def _get_partition_bounds(self):
+        """Defines bounds of the new partition of the natively partitioned table"""
+        raise NotImplementedError('Partition bounds method not implemented for partition type: {0}'.format(self.__class__.__name__))
+
 
 class RangePartition(Partition):
     """Range partition type implementation"""
@@ -82,21 +553,92 @@ class RangePartition(Partition):
         super(RangePartition, self).__init__(*args, **kwargs)
         self.partition_range = kwargs['partition_range']
         self.partition_subtype = kwargs['partition_subtype']
+        self.datetime = DateTimeUtil(self.column_value, self.partition_range, model=self.model)
+        self.integer = IntegerUtil(self.column_value, self.partition_range, model=self.model)
+
+    def _get_name(self):
+        """Dynamically defines new partition name depending on the partition subtype"""
+        return self._get_subtype_method('name')()
 
-    def _get_partition_function(self):
+    def get_names(self, values):
+        """Dynamically defines names of the partitions for a batch of values depending on the partition subtype"""
+        return self._get_subtype_method('batch_names')(values)
+
+    def _get_partition_key(self):
+        """Defines partition key of the natively partitioned table"""
+        return 'RANGE ({0})'.format(self.partition_column)
+
+    def _get_partition_bounds(self):
+        """Dynamically defines bounds of the new partition depending on the partition subtype"""
+        return self._get_subtype_method('partition_bounds')()
+
+    def _get_name_value(self, name):
+        """Dynamically defines a value which belongs to the partition depending on the partition subtype"""
+        return self._get_subtype_method('name_value')(name)
+
+    def _get_check_constraint(self, column=None):
+        """Dynamically defines check constraint of the child table depending on the partition subtype"""
+        return self._get_subtype_method('check_constraint')(column or self.partition_column)
+
+    def _get_partition_function(self, static_branches=''):
         """Dynamically loads needed before insert function body depending on the partition subtype"""
+        return self._get_subtype_method('partition_function')(static_branches)
+
+    def _get_subtype_method(self, method):
+        """Dynamically loads needed method implementation depending on the partition subtype"""
         try:
-            return getattr(self, '_get_{0}_partition_function'.format(self.partition_subtype))()
+            return getattr(self, '_get_{0}_{1}'.format(self.partition_subtype, method))
         except AttributeError:
             import re
             raise PartitionRangeSubtypeError(
                 model=self.model,
                 current_value=self.partition_subtype,
-                allowed_values=[re.match('_get_(\w+)_partition_function', c).group(1) for c in dir(
-                    self) if re.match('_get_\w+_partition_function', c) is not None]
+                allowed_values=[re.match('_get_(\w+)_{0}$'.format(method), c).group(1) for c in dir(
+                    self) if re.match('_get_\w+_{0}$'.format(method), c) is not None]
             )
 
-    def _get_date_partition_function(self):
+    def _get_column_type(self):
+        """Returns SQL type of the partition column, resolved once per table and cached until the metadata is refreshed"""
+        column_type = metadata.get(self.using, self.table, ('column_type', self.partition_column))
+
+        if column_type is not None:
+            return column_type
+
+        self.cursor.execute("""
+            SELECT format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = '{parent_table}'::regclass AND attname = '{partition_column}';
+        """.format(
+            parent_table=self.table,
+            partition_column=self.partition_column,
+        ))
+
+        column_type = self.cursor.fetchone()[0]
+        metadata.set(self.using, self.table, ('column_type', self.partition_column), column_type)
+        return column_type
+
+    def _get_date_name(self):
+        """Defines name for a new partition for date partition subtype, mirrors names created by the trigger"""
+        return '{0}_{1}'.format(self.table, self.datetime.get_name())
+
+    def _get_date_batch_names(self, values):
+        """Defines names of the partitions for a batch of values for date partition subtype, once for every distinct day"""
+        return ['{0}_{1}'.format(self.table, name) for name in self.datetime.get_names(
+            [self._get_stored_value(value) for value in values])]
+
+    def _get_date_partition_bounds(self):
+        """Defines bounds of the new partition for date partition subtype"""
+        return "FROM ('{0}') TO ('{1}')".format(*self.datetime.get_range())
+
+    def _get_date_name_value(self, name):
+        """Defines a value which belongs to the partition with the given name for date partition subtype"""
+        return DateTimeUtil.from_name(name, self.partition_range)
+
+    def _get_date_check_constraint(self, column):
+        """Defines check constraint of the child table for date partition subtype"""
+        return "{0} >= '{1}' AND {0} < '{2}'".format(column, *self.datetime.get_range())
+
+    def _get_date_partition_function(self, static_branches):
         """Contains a before insert function body for date partition subtype"""
         patterns = {
             'day': '"y"YYYY"d"DDD',
@@ -112,35 +654,231 @@ class RangePartition(Partition):
 
         return """
             DECLARE tablename TEXT;
-            DECLARE columntype TEXT;
             DECLARE startdate TIMESTAMP;
             BEGIN
+                {static_branches}
+
                 startdate := date_trunc('{partition_range}', NEW.{partition_column});
                 tablename := '{parent_table}_' || to_char(NEW.{partition_column}, '{partition_pattern}');
 
-                IF NOT EXISTS(
-                    SELECT 1 FROM information_schema.tables WHERE table_name=tablename)
-                THEN
-                    SELECT data_type INTO columntype
-                    FROM information_schema.columns
-                    WHERE table_name = '{parent_table}' AND column_name = '{partition_column}';
-
-                    EXECUTE 'CREATE TABLE ' || tablename || ' (
-                        CHECK (
-                            {partition_column} >= ''' || startdate || '''::' || columntype || ' AND
-                            {partition_column} < ''' || (startdate + '1 {partition_range}'::interval) || '''::' || columntype || '
-                        )
-                    ) INHERITS ({parent_table});';
-
-                    EXECUTE 'CREATE INDEX ' || tablename || '_{partition_column} ON ' || tablename || ' ({partition_column});';
+                {routing_statement}
+            END;
+        """.format(
+            static_branches=static_branches,
+            parent_table=self.table,
+            routing_statement=self._get_routing_statement(
+                "{0} >= ''' || startdate || '''::{1} AND {0} < ''' || (startdate + '1 {2}'::interval) || '''::{1}".format(
+                    self.partition_column, self._get_column_type(), self.partition_range)),
+            partition_range=self.partition_range,
+            partition_column=self.partition_column,
+            partition_pattern=partition_pattern,
+        )
+
+    def _get_integer_name(self):
+        """Defines name for a new partition for integer partition subtype, mirrors names created by the trigger"""
+        return '{0}_{1}'.format(self.table, self.integer.get_name())
+
+    def _get_integer_batch_names(self, values):
+        """Defines names of the partitions for a batch of values for integer partition subtype"""
+        return super(RangePartition, self).get_names(values)
+
+    def _get_integer_partition_bounds(self):
+        """Defines bounds of the new partition for integer partition subtype"""
+        return 'FROM ({0}) TO ({1})'.format(*self.integer.get_range())
+
+    def _get_integer_name_value(self, name):
+        """Defines a value which belongs to the partition with the given name for integer partition subtype"""
+        block = IntegerUtil.from_name(name)
+        return block * self.integer.get_size() if block is not None else None
+
+    def _get_integer_check_constraint(self, column):
+        """Defines check constraint of the child table for integer partition subtype"""
+        return '{0} >= {1} AND {0} < {2}'.format(column, *self.integer.get_range())
+
+    def _get_integer_partition_function(self, static_branches):
+        """Contains a before insert function body for integer partition subtype"""
+        return """
+            DECLARE tablename TEXT;
+            DECLARE block BIGINT;
+            BEGIN
+                {static_branches}
+
+                block := floor(NEW.{partition_column}::numeric / {partition_range})::bigint;
+                tablename := '{parent_table}_i' || replace(block::text, '-', 'n');
+
+                {routing_statement}
+            END;
+        """.format(
+            static_branches=static_branches,
+            parent_table=self.table,
+            routing_statement=self._get_routing_statement(
+                "{0} >= ' || block * {1} || ' AND {0} < ' || (block + 1) * {1} || '".format(
+                    self.partition_column, self.integer.get_size())),
+            partition_column=self.partition_column,
+            partition_range=self.integer.get_size(),
+        )
+
+
+class HashPartition(Partition):
+    """
+    Hash partition type implementation, partition column should be of integer type. In trigger mode
+    a record is put to the partition number mod(abs(value), count), the same way MySQL does. In native mode PostgreSQL uses its
+    own hash function, that's why all partitions are created by prepare() and partition names
+    computed at the python level don't tell which partition contains a record
+    """
+    def __init__(self, *args, **kwargs):
+        super(HashPartition, self).__init__(*args, **kwargs)
+        self.partition_count = kwargs['partition_count']
+
+    def _prepare_native(self):
+        """Converts original table to natively partitioned one and creates all partitions"""
+        super(HashPartition, self)._prepare_native()
+
+        for remainder in range(self.partition_count):
+            self.column_value = remainder
+            super(HashPartition, self)._create_native()
+
+    def _exists_native(self):
+        """Checks if partition exists. All partitions are created by prepare() in native mode"""
+        return True
+
+    def _create_native(self):
+        """Creates new partition. Not used in native mode because all partitions are created by prepare()"""
+        pass
+
+    def _get_name(self):
+        """Defines name of the partition number mod(abs(value), count)"""
+        return '{0}_p{1}'.format(self.table, self._get_remainder())
+
+    def _get_remainder(self):
+        """Returns number of the partition, it is never negative, so that it can be a part of the partition name"""
+        return abs(self.column_value) % self.partition_count
+
+    def _get_copy_table(self):
+        """Defines table which rows are copied into, in native mode PostgreSQL routes them by its own hash function"""
+        return self.table if self.partition_mode == 'native' else self._get_name()
+
+    def _get_name_value(self, name):
+        """Defines a value which belongs to the partition with the given name"""
+        match = re.match('^p(\d+)$', name)
+        return int(match.group(1)) if match is not None else None
+
+    def _get_check_constraint(self, column=None):
+        """Defines check constraint of the child table"""
+        return 'mod(abs({0}), {1}) = {2}'.format(column or self.partition_column, self.partition_count, self._get_remainder())
+
+    def _get_partition_key(self):
+        """Defines partition key of the natively partitioned table"""
+        return 'HASH ({0})'.format(self.partition_column)
+
+    def _get_partition_bounds(self):
+        """Defines bounds of the new partition of the natively partitioned table"""
+        return 'WITH (MODULUS {0}, REMAINDER {1})'.format(self.partition_count, self._get_remainder())
+
+    def _get_partition_function(self, static_branches=''):
+        """Contains a before insert function body"""
+        return """
+            DECLARE tablename TEXT;
+            DECLARE remainder INTEGER;
+            BEGIN
+                {static_branches}
+
+                remainder := mod(abs(NEW.{partition_column}), {partition_count});
+                tablename := '{parent_table}_p' || remainder;
+
+                {routing_statement}
+            END;
+        """.format(
+            static_branches=static_branches,
+            parent_table=self.table,
+            routing_statement=self._get_routing_statement(
+                "mod(abs({0}), {1}) = ' || remainder || '".format(self.partition_column, self.partition_count)),
+            partition_column=self.partition_column,
+            partition_count=self.partition_count,
+        )
+
+
+class ListPartition(Partition):
+    """List partition type implementation, partitions and their values are defined by partition_list setting"""
+    def __init__(self, *args, **kwargs):
+        super(ListPartition, self).__init__(*args, **kwargs)
+        self.partition_list = kwargs['partition_list']
+
+    def _get_name(self):
+        """Defines name of the partition which contains partition column value"""
+        return '{0}_{1}'.format(self.table, self._get_key())
+
+    def _get_key(self):
+        """Returns partition_list key of the list which contains partition column value"""
+        for key, values in self.partition_list.items():
+            if self.column_value in values:
+                return key
+
+        raise PartitionValueError(
+            model=self.model,
+            current_value=self.column_value,
+            allowed_values=[str(value) for values in self.partition_list.values() for value in values]
+        )
+
+    def _get_values(self, key):
+        """Returns comma separated SQL literals of the values from the given partition_list key"""
+        return ', '.join(quote_value(value) for value in self.partition_list[key])
+
+    def _get_name_value(self, name):
+        """Defines a value which belongs to the partition with the given name"""
+        for key, values in self.partition_list.items():
+            if str(key) == name and values:
+                return values[0]
+
+        return None
+
+    def _get_check_constraint(self, column=None):
+        """Defines check constraint of the child table"""
+        return '{0} IN ({1})'.format(column or self.partition_column, self._get_values(self._get_key()))
+
+    def _get_partition_key(self):
+        """Defines partition key of the natively partitioned table"""
+        return 'LIST ({0})'.format(self.partition_column)
+
+    def _get_partition_bounds(self):
+        """Defines bounds of the new partition of the natively partitioned table"""
+        return 'IN ({0})'.format(self._get_values(self._get_key()))
+
+    def _get_partition_function(self, static_branches=''):
+        """Contains a before insert function body, every list gets its own branch"""
+        branches = []
+
+        for key in sorted(self.partition_list):
+            branches.append("""
+                {condition} NEW.{partition_column} IN ({values}) THEN
+                    tablename := '{parent_table}_{key}';
+                    listvalues := '{quoted_values}';
+            """.format(
+                condition='ELSIF' if branches else 'IF',
+                parent_table=self.table,
+                partition_column=self.partition_column,
+                key=key,
+                values=self._get_values(key),
+                quoted_values=self._get_values(key).replace("'", "''"),
+            ))
+
+        return """
+            DECLARE tablename TEXT;
+            DECLARE listvalues TEXT;
+            BEGIN
+                {static_branches}
+
+                {branches}
+                ELSE
+                    RAISE EXCEPTION 'Value % doesn''t belong to any partition of {parent_table}', NEW.{partition_column};
                 END IF;
 
-                EXECUTE 'INSERT INTO ' || tablename || ' VALUES (($1).*);' USING NEW;
-                RETURN NEW;
+                {routing_statement}
             END;
         """.format(
+            branches=''.join(branches),
+            static_branches=static_branches,
             parent_table=self.table,
-            partition_range=self.partition_range,
+            routing_statement=self._get_routing_statement("{0} IN (' || listvalues || ')".format(self.partition_column)),
             partition_column=self.partition_column,
-            partition_pattern=partition_pattern
         )
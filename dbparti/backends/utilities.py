@@ -1,35 +1,133 @@
+import re
+import numbers
+import threading
 from datetime import datetime, timedelta
-from dbparti.backends.exceptions import PartitionRangeError
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+try:
+    from django.utils.encoding import force_text
+except ImportError:
+    from django.utils.encoding import force_unicode as force_text
+from dbparti.backends.exceptions import PartitionRangeError, PartitionProvisioningError
 
 
 """Provides date and time calculations for some database backends"""
 class DateTimeUtil(object):
+    patterns = {
+        'day': {'real': 'y%Yd%j', 'none': 'y0000d000'},
+        'week': {'real': 'y%Gw%V', 'none': 'y0000w00'},
+        'month': {'real': 'y%Ym%m', 'none': 'y0000m00'},
+        'year': {'real': 'y%Y', 'none': 'y0000'},
+    }
+
+    # Name and bounds of the period keyed by period and ordinal of the day, every period consists of whole days
+    # so that all dates of the same day share the same entry. Cache is dropped as a whole when it becomes too big
+    cache = {}
+    cache_size = 4096
+
     def __init__(self, now, period, format='%Y-%m-%d %H:%M:%S', model=None):
         self.now = now
         self.period = period
         self.format = format
         self.model = model
 
+    @classmethod
+    def from_name(cls, name, period):
+        """Returns beginning of the period which has the given name, i.e. y2014m01, or None if name doesn't match period"""
+        match = re.match('^y(\d{4})(?:([dwm])(\d+))?$', name or '')
+
+        if match is None or int(match.group(1)) == 0 or {'day': 'd', 'week': 'w', 'month': 'm'}.get(period) != match.group(2):
+            return None
+
+        year, number = int(match.group(1)), int(match.group(3) or 0)
+
+        try:
+            if period == 'day':
+                return datetime(year, 1, 1) + timedelta(days=number - 1)
+            elif period == 'week':
+                return datetime(year, 1, 4) - timedelta(days=datetime(year, 1, 4).weekday()) + timedelta(weeks=number - 1)
+            elif period == 'month':
+                return datetime(year, number, 1)
+
+            return datetime(year, 1, 1)
+        except ValueError:
+            return None
+
     def get_name(self):
         """Returns name of the partition depending on the given date and period"""
-        patterns = {
-            'day': {'real': 'y%Yd%j', 'none': 'y0000d000'},
-            'week': {'real': 'y%Yw%V', 'none': 'y0000w00'},
-            'month': {'real': 'y%Ym%m', 'none': 'y0000m00'},
-            'year': {'real': 'y%Y', 'none': 'y0000'},
-        }
+        if self.now is None:
+            return self._get_pattern()['none']
 
-        try:
-            return patterns[self.period]['none'] if self.now is None else self.now.strftime(patterns[self.period]['real'])
-        except KeyError:
-            raise PartitionRangeError(model=self.model, current_value=self.period, allowed_values=patterns.keys())
+        return self._get_cached()[0]
+
+    def get_names(self, values):
+        """Returns names of the partitions for a batch of dates, name is computed only once for every distinct day"""
+        names, result = {}, []
+
+        for value in values:
+            key = None if value is None else value.toordinal()
+
+            try:
+                result.append(names[key])
+            except KeyError:
+                result.append(names.setdefault(key, DateTimeUtil(value, self.period, self.format, self.model).get_name()))
+
+        return result
+
+    def get_bounds(self):
+        """Returns beginning and an end of the period as naive datetime objects"""
+        return self._get_cached()[1:]
 
     def get_period(self):
         """Dynamically returns beginning and an end depending on the given period"""
+        start, end = self.get_bounds()
+        return start.strftime(self.format), end.strftime(self.format)
+
+    def get_range(self):
+        """Returns beginning of the given period and beginning of the next period, i.e. a half-open range"""
+        start, end = self.get_bounds()
+        return start.strftime(self.format), (end + timedelta(microseconds=1)).strftime(self.format)
+
+    def shift(self, periods):
+        """Returns a date which belongs to the period that is the given number of periods away from the current one"""
+        now = self.now
+
+        for _ in range(abs(periods)):
+            start, end = DateTimeUtil(now, self.period, self.format, self.model).get_bounds()
+            now = end + timedelta(microseconds=1) if periods > 0 else start - timedelta(microseconds=1)
+
+        return now
+
+    def _get_cached(self):
+        """Returns name, beginning and an end of the period, computes them only if they aren't cached yet"""
+        key = (self.period, self.now.toordinal())
+
         try:
-            return getattr(self, '_get_{0}_period'.format(self.period))()
+            return self.cache[key]
+        except KeyError:
+            pass
+
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+
+        start, end = self._get_bounds()
+        value = self.cache[key] = (self.now.strftime(self._get_pattern()['real']), start, end)
+        return value
+
+    def _get_pattern(self):
+        """Returns name patterns for the given period"""
+        try:
+            return self.patterns[self.period]
+        except KeyError:
+            raise PartitionRangeError(model=self.model, current_value=self.period, allowed_values=self.patterns.keys())
+
+    def _get_bounds(self):
+        """Dynamically computes beginning and an end as datetime objects depending on the given period"""
+        try:
+            bounds = getattr(self, '_get_{0}_period'.format(self.period))
         except AttributeError:
-            import re
             raise PartitionRangeError(
                 model=self.model,
                 current_value=self.period,
@@ -37,43 +135,234 @@ class DateTimeUtil(object):
                     self) if re.match('_get_\w+_period', c) is not None]
             )
 
+        return bounds()
+
     def _get_day_period(self):
         """Returns beginning and an end for a day period"""
-        start = self.now.replace(hour=0, minute=0, second=0, microsecond=0)
-        end = self.now.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-        return start.strftime(self.format), end.strftime(self.format)
+        start = datetime(self.now.year, self.now.month, self.now.day)
+        return start, start + timedelta(days=1, microseconds=-1)
 
     def _get_week_period(self):
-        """Returns beginning and an end for a week period"""
-        date_ = datetime(self.now.year, 1, 1)
+        """Returns beginning and an end for an ISO week period, which always starts on monday"""
+        start = datetime(self.now.year, self.now.month, self.now.day) - timedelta(days=self.now.weekday())
+        return start, start + timedelta(days=7, microseconds=-1)
 
-        if date_.weekday() > 3:
-            date_ = date_ + timedelta(7 - date_.weekday())
-        else:
-            date_ = date_ - timedelta(date_.weekday())
+    def _get_month_period(self):
+        """Returns beginning and an end for a month period"""
+        start = datetime(self.now.year, self.now.month, 1)
+        following = datetime(self.now.year + 1, 1, 1) if self.now.month == 12 else datetime(self.now.year, self.now.month + 1, 1)
 
-        days = timedelta(days=(int(self.now.strftime('%V')) - 1) * 7)
+        return start, following - timedelta(microseconds=1)
 
-        start = (date_ + days)
-        end = (date_ + days + timedelta(days=6)).replace(hour=23, minute=59, second=59, microsecond=999999)
+    def _get_year_period(self):
+        """Returns beginning and an end for a year period"""
+        return datetime(self.now.year, 1, 1), datetime(self.now.year + 1, 1, 1) - timedelta(microseconds=1)
 
-        return start.strftime(self.format), end.strftime(self.format)
 
-    def _get_month_period(self):
-        """Returns beginning and an end for a month period"""
-        fday = datetime(self.now.year, self.now.month, 1)
+"""Provides integer block calculations for some database backends"""
+class IntegerUtil(object):
+    def __init__(self, value, size, model=None):
+        self.value = value
+        self.size = size
+        self.model = model
 
-        if self.now.month == 12:
-            lday = datetime(self.now.year, self.now.month, 31, 23, 59, 59, 999999)
-        else:
-            lday = (datetime(self.now.year, self.now.month + 1, 1, 23, 59, 59, 999999) - timedelta(days=1))
+    @classmethod
+    def from_name(cls, name):
+        """Returns number of the block which has the given name, i.e. i5 or in5 for a negative one, or None if name doesn't match"""
+        match = re.match('^i(n?)(\d+)$', name or '')
 
-        return fday.strftime(self.format), lday.strftime(self.format)
+        if match is None:
+            return None
+
+        return -int(match.group(2)) if match.group(1) else int(match.group(2))
+
+    def get_name(self):
+        """Returns name of the partition depending on the given value and block size, minus sign isn't allowed in names"""
+        if self.value is None:
+            return 'inone'
+
+        block = self.get_block()
+        return 'i{0}'.format(block) if block >= 0 else 'in{0}'.format(-block)
+
+    def get_size(self):
+        """Returns block size if it is valid"""
+        if not isinstance(self.size, numbers.Integral) or isinstance(self.size, bool) or self.size <= 0:
+            raise PartitionRangeError(model=self.model, current_value=self.size, allowed_values=['any positive integer'])
+
+        return self.size
+
+    def get_block(self):
+        """Returns number of the block the given value belongs to"""
+        return self.value // self.get_size()
+
+    def get_range(self):
+        """Returns beginning of the block and beginning of the next block, i.e. a half-open range"""
+        start = self.get_block() * self.size
+        return start, start + self.size
+
+
+def quote_value(value):
+    """Returns SQL literal for the value from model settings, i.e. for a value from partition_list"""
+    if isinstance(value, numbers.Number) and not isinstance(value, bool):
+        return str(value)
+
+    return "'{0}'".format(str(value).replace("'", "''"))
+
+
+def quote_copy_value(value):
+    """Returns value in the text format of COPY statement, which uses backslash escapes and \\N for NULL"""
+    if value is None:
+        return u'\\N'
+
+    return force_text(value).replace(u'\\', u'\\\\').replace(u'\t', u'\\t').replace(u'\n', u'\\n').replace(u'\r', u'\\r')
+
+
+"""Remembers which partitions are known to exist to avoid unneeded metadata queries"""
+class PartitionRegistry(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.partitions = set()
+
+    def contains(self, using, table, name):
+        """Checks if partition is known to exist in the given database"""
+        return (using, table, name) in self.partitions
+
+    def add(self, using, table, name):
+        """Remembers that partition exists in the given database"""
+        with self.lock:
+            self.partitions.add((using, table, name))
+
+    def discard(self, using, table, name):
+        """Forgets about partition, i.e. when it was dropped"""
+        with self.lock:
+            self.partitions.discard((using, table, name))
+
+    def clear(self, using=None, table=None):
+        """Forgets about all partitions of the given table in the given database or about all partitions at all"""
+        with self.lock:
+            if using is None:
+                self.partitions.clear()
+            else:
+                self.partitions = set(key for key in self.partitions if key[:2] != (using, table))
+
+
+registry = PartitionRegistry()
+
+
+"""Remembers table metadata which doesn't change until the table itself is altered, i.e. column types"""
+class MetadataCache(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+
+    def get(self, using, table, key, default=None):
+        """Returns cached value for the given table or default value if nothing is cached yet"""
+        return self.data.get((using, table, key), default)
+
+    def set(self, using, table, key, value):
+        """Caches value for the given table"""
+        with self.lock:
+            self.data[(using, table, key)] = value
+
+    def clear(self, using=None, table=None):
+        """Forgets cached values of the given table in the given database or all cached values at all"""
+        with self.lock:
+            if using is None:
+                self.data.clear()
+            else:
+                self.data = dict((key, value) for key, value in self.data.items() if key[:2] != (using, table))
+
+
+metadata = MetadataCache()
+
+
+"""Creates missing partitions in background worker threads outside of the caller's transaction"""
+class PartitionProvisioner(object):
+    def __init__(self, workers=4, timeout=30):
+        self.workers = workers
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.queue = Queue()
+        self.threads = []
+        self.pending = {}
+
+    def provision(self, model, partition):
+        """
+        Requests creation of the given partition and blocks until it is created. Only one creation
+        is performed for concurrent requests of the same partition, all requesters wait for it. Partition
+        is created inline if the caller is inside a transaction, because its locks on the partitioned table
+        would block creation in the worker forever, other waits are limited by the timeout
+        """
+        if self._in_transaction(partition.using):
+            partition.create()
+            return
+
+        key = (partition.using, partition.table, partition._get_name())
+
+        with self.lock:
+            request = self.pending.get(key)
+
+            if request is None:
+                request = self.pending[key] = ProvisionRequest(model, partition.column_value, partition.using)
+                self.queue.put((key, request))
+                self._start_workers()
+
+        if not request.event.wait(self.timeout):
+            raise PartitionProvisioningError(model=partition.model, current_value=key[2], allowed_values=[str(self.timeout)])
+
+        if request.error is not None:
+            raise request.error
+
+    def _in_transaction(self, using):
+        """Checks if the caller's connection is inside a transaction which is committed by the caller"""
+        from django.db import connections, transaction
+
+        connection = connections[using]
+
+        if hasattr(connection, 'in_atomic_block'):
+            return connection.in_atomic_block
+
+        return transaction.is_managed(using=using)
+
+    def _start_workers(self):
+        """Starts worker threads if they aren't started yet"""
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self._work, name='dbparti-provisioner-{0}'.format(len(self.threads)))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def _work(self):
+        """Creates requested partitions one by one, every worker thread uses its own database connection"""
+        from django.db import connections
+
+        while True:
+            key, request = self.queue.get()
+
+            try:
+                partition = request.model.get_partition_for(request.column_value, using=request.using)
+
+                if not partition.exists():
+                    partition.create()
+            except Exception as e:
+                request.error = e
+            finally:
+                connections[request.using].close()
+
+                with self.lock:
+                    del self.pending[key]
+
+                request.event.set()
+
+
+class ProvisionRequest(object):
+    """Partition creation request which can be waited for by several requesters"""
+    def __init__(self, model, column_value, using):
+        self.model = model
+        self.column_value = column_value
+        self.using = using
+        self.event = threading.Event()
+        self.error = None
 
-    def _get_year_period(self):
-        """Returns beginning and an end for a year period"""
-        fday = datetime(self.now.year, 1, 1)
-        lday = (datetime(self.now.year + 1, 1, 1, 23, 59, 59, 999999) - timedelta(days=1))
 
-        return fday.strftime(self.format), lday.strftime(self.format)
+provisioner = PartitionProvisioner()
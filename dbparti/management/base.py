@@ -0,0 +1,101 @@
+import time
+import threading
+from optparse import make_option
+from dbparti.models import Partitionable
+from django.db import connections
+from django.db.models import get_models
+from django.core.management.base import AppCommand, CommandError
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty
+
+
+class PartitionableCommand(AppCommand):
+    """
+    Base class for commands which should be run for every partitionable model in the given apps.
+    Models from all apps can be processed concurrently by a bounded pool of worker threads,
+    every worker thread uses its own database connections
+    """
+    success_message = 'Successfully processed the following models: '
+    option_list = AppCommand.option_list + (
+        make_option('--database', action='store', dest='database', default=None,
+                    help='Database to run the command for, defaults to the database chosen by database routers'),
+        make_option('--workers', action='store', type='int', dest='workers', default=1,
+                    help='Number of models to process concurrently, defaults to 1'),
+    )
+
+    def handle(self, *app_labels, **options):
+        """Collects partitionable models from all the given apps and processes them"""
+        self.models = []
+        self.lock = threading.Lock()
+        super(PartitionableCommand, self).handle(*app_labels, **options)
+
+        if not self.models:
+            return
+
+        queue = Queue()
+        succeeded, failed = [], []
+
+        for model in self.models:
+            queue.put(model)
+
+        if options['workers'] > 1:
+            threads = [threading.Thread(target=self._work, args=(queue, succeeded, failed, True), kwargs=options)
+                       for _ in range(min(options['workers'], len(self.models)))]
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+        else:
+            self._work(queue, succeeded, failed, False, **options)
+
+        if succeeded:
+            self.stdout.write(self.success_message + ', '.join(sorted(succeeded)) + '\n')
+
+        if failed:
+            raise CommandError('Failed to process the following models: ' + ', '.join(sorted(failed)))
+
+    def handle_app(self, app, **options):
+        """Collects all partitionable models in an app"""
+        models = [model for model in get_models(app) if issubclass(model, Partitionable)]
+
+        if not models:
+            self.stderr.write('Unable to find any partitionable models in an app: ' + app.__name__.split('.')[0] + '\n')
+
+        self.models.extend(models)
+
+    def handle_model(self, model, **options):
+        """Does the actual work for one partitionable model"""
+        raise NotImplementedError('Subclasses of PartitionableCommand must provide a handle_model() method')
+
+    def report(self, model, message):
+        """Writes a progress message for the given model, can be called from any worker thread"""
+        with self.lock:
+            self.stdout.write('{0}: {1}\n'.format(model.__name__, message))
+
+    def _work(self, queue, succeeded, failed, close_connections, **options):
+        """Processes models from the queue until it is empty"""
+        while True:
+            try:
+                model = queue.get_nowait()
+            except Empty:
+                return
+
+            started = time.time()
+            self.report(model, 'started')
+
+            try:
+                self.handle_model(model, **options)
+            except Exception as e:
+                failed.append(model.__name__)
+                self.report(model, 'failed after {0:.1f}s: {1}'.format(time.time() - started, e))
+            else:
+                succeeded.append(model.__name__)
+                self.report(model, 'finished in {0:.1f}s'.format(time.time() - started))
+            finally:
+                if close_connections:
+                    for connection in connections.all():
+                        connection.close()
@@ -1,25 +1,39 @@
-from dbparti.models import Partitionable
-from django.db.models import get_models
-from django.core.management.base import AppCommand
+from optparse import make_option
+from dbparti.management.base import PartitionableCommand
 
 
-class Command(AppCommand):
+class Command(PartitionableCommand):
     help = 'Configures the database for partitioned models'
+    success_message = 'Successfully (re)configured the database for the following models: '
+    option_list = PartitionableCommand.option_list + (
+        make_option('--online', action='store_true', dest='online', default=False,
+                    help='Copy existing rows to partitioned table in chunks instead of altering the table at once'),
+        make_option('--chunk-size', action='store', type='int', dest='chunk_size', default=10000,
+                    help='Number of rows copied in one transaction when --online is used, defaults to 10000'),
+        make_option('--sleep', action='store', type='float', dest='sleep', default=0,
+                    help='Number of seconds to sleep between chunks when --online is used, defaults to 0'),
+        make_option('--max-lag', action='store', type='int', dest='max_lag', default=None,
+                    help='Pause copying while replication lag of any --replica is greater than this number of seconds'),
+        make_option('--replica', action='append', dest='replicas', default=[],
+                    help='Database alias of a replica to check replication lag for, can be given several times'),
+        make_option('--static-routing', action='store_true', dest='static_routing', default=False,
+                    help='Route records to the existing partitions with static statements instead of dynamic SQL'),
+    )
 
-    def handle_app(self, app, **options):
+    def handle_model(self, model, **options):
         """Configures all needed database stuff depending on the backend used"""
-        names = []
+        model_instance = model()
+        partition = model_instance.get_partition(using=options['database'])
 
-        for model in get_models(app):
-            if issubclass(model, Partitionable):
-                names.append(model.__name__)
-
-                model_instance = model()
-                model_instance.get_partition().prepare()
-
-        if not names:
-            self.stderr.write('Unable to find any partitionable models in an app: ' + app.__name__.split('.')[0] + '\n')
-        else:
-            self.stdout.write(
-                'Successfully (re)configured the database for the following models: ' + ', '.join(names) + '\n'
+        if options['online']:
+            partition.prepare_online(
+                chunk_size=options['chunk_size'],
+                sleep=options['sleep'],
+                replicas=options['replicas'],
+                max_lag=options['max_lag'],
             )
+        else:
+            partition.prepare()
+
+        if options['static_routing']:
+            partition.refresh_routing()
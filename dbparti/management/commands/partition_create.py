@@ -0,0 +1,23 @@
+from optparse import make_option
+from django.utils import timezone
+from dbparti.backends.utilities import DateTimeUtil
+from dbparti.management.base import PartitionableCommand
+
+
+class Command(PartitionableCommand):
+    help = 'Creates partitions for the current and the given number of next periods ahead of time'
+    success_message = 'Successfully created partitions ahead of time for the following models: '
+    option_list = PartitionableCommand.option_list + (
+        make_option('--count', action='store', type='int', dest='count', default=1,
+                    help='Number of next periods to create partitions for, defaults to 1'),
+    )
+
+    def handle_model(self, model, **options):
+        """Creates all missing partitions starting from the current period"""
+        if model._meta.partition_type != 'range' or model._meta.partition_subtype != 'date':
+            return
+
+        datetime = DateTimeUtil(timezone.now(), model._meta.partition_range, model=model.__name__)
+
+        for periods in range(options['count'] + 1):
+            model.get_partition_for(datetime.shift(periods), using=options['database']).ensure()
@@ -0,0 +1,18 @@
+from optparse import make_option
+from dbparti.management.base import PartitionableCommand
+
+
+class Command(PartitionableCommand):
+    help = 'Moves rows which were stored before partitioning was configured into the partitions'
+    success_message = 'Successfully moved existing rows into partitions for the following models: '
+    option_list = PartitionableCommand.option_list + (
+        make_option('--chunk-size', action='store', type='int', dest='chunk_size', default=10000,
+                    help='Number of rows moved in one transaction, defaults to 10000'),
+        make_option('--sleep', action='store', type='float', dest='sleep', default=0,
+                    help='Number of seconds to sleep between chunks, defaults to 0'),
+    )
+
+    def handle_model(self, model, **options):
+        """Moves all existing rows of the model into the partitions chunk by chunk"""
+        partition = model.get_partition_for(None, using=options['database'])
+        self.report(model, 'moved {0} rows'.format(partition.migrate(chunk_size=options['chunk_size'], sleep=options['sleep'])))
@@ -0,0 +1,36 @@
+from optparse import make_option
+from django.utils import timezone
+from dbparti.backends.utilities import DateTimeUtil
+from dbparti.management.base import PartitionableCommand
+
+
+class Command(PartitionableCommand):
+    help = 'Drops or detaches partitions which are older than the retention period of partitioned models'
+    success_message = 'Successfully applied retention policy for the following models: '
+    option_list = PartitionableCommand.option_list + (
+        make_option('--detach', action='store_true', dest='detach', default=False,
+                    help='Detach expired partitions and keep them as standalone tables instead of dropping them'),
+    )
+
+    def handle_model(self, model, **options):
+        """Drops or detaches all partitions which are older than the given number of periods"""
+        retention = getattr(model._meta, 'partition_retention', None)
+
+        if not retention:
+            return
+
+        datetime = DateTimeUtil(timezone.now(), model._meta.partition_range, model=model.__name__)
+        value = datetime.shift(-retention)
+        partition = model.get_partition_for(value, using=options['database'])
+        newest = partition._get_name()
+        expired = set(name for name in partition.all() if name <= newest)
+
+        # Partition names are sortable, so we walk back period by period until there is nothing older to drop
+        while expired and partition._get_name() >= min(expired):
+            if partition._get_name() in expired:
+                partition.drop(detach=options['detach'])
+                expired.discard(partition._get_name())
+                self.report(model, '{0} {1}'.format('detached' if options['detach'] else 'dropped', partition._get_name()))
+
+            value = DateTimeUtil(value, model._meta.partition_range, model=model.__name__).shift(-1)
+            partition = model.get_partition_for(value, using=options['database'])
@@ -0,0 +1,11 @@
+from dbparti.management.base import PartitionableCommand
+
+
+class Command(PartitionableCommand):
+    help = 'Shows all partitions of partitioned models with their bounds, row estimates and sizes'
+    success_message = 'Successfully collected partition statistics for the following models: '
+
+    def handle_model(self, model, **options):
+        """Reports every partition of the model on a separate line"""
+        for partition in model.get_partitions(using=options['database']):
+            self.report(model, '{name} rows={rows} size={size} index_size={index_size} bounds={bounds}'.format(**partition))
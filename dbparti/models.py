@@ -1,6 +1,14 @@
-from django.db import models
-from dbparti import backend
-from dbparti.backends.exceptions import PartitionColumnError, PartitionTypeError
+import threading
+from itertools import islice
+try:
+    from queue import Queue, Empty, Full
+except ImportError:
+    from Queue import Queue, Empty, Full
+import django
+from django.db import models, router, connections, transaction
+from dbparti import get_backend
+from dbparti.backends.utilities import registry, metadata, provisioner
+from dbparti.backends.exceptions import PartitionColumnError, PartitionTypeError, PartitionFilterError
 
 
 models.options.DEFAULT_NAMES += (
@@ -9,15 +17,222 @@ models.options.DEFAULT_NAMES += (
     'partition_type',
     'partition_subtype',
     'partition_list',
+    'partition_count',
+    'partition_mode',
+    'partition_retention',
+    'partition_provisioning',
+    'partition_indexes',
+    'partition_storage',
 )
 
+# Partition class and partition column type of every partitionable model in every database, they never change at runtime
+partition_classes = {}
+
+
+class PartitionableQuerySet(models.query.QuerySet):
+    def in_partition(self, partition_show):
+        """Limits queryset to the records from the given partition, i.e. current or previous"""
+        if partition_show == 'all':
+            return self._clone()
+
+        return self.extra(where=self.model.get_partition_filter(partition_show, using=self.db).apply())
+
+    def iterate_partitions(self, partitions=None, chunk_size=1000, workers=1):
+        """
+        Yields records partition by partition, every partition is read in chunks ordered by primary key, so
+        memory usage is bounded by the chunk size whatever the number of records is. Partitions default to
+        all existing partitions. Several partitions can be read concurrently by worker threads, each with its
+        own database connection, records from different partitions are interleaved in that case
+        """
+        if partitions is None:
+            partitions = [partition['name'] for partition in self.model.get_partitions(using=self.db)]
+
+        if workers <= 1:
+            for name in partitions:
+                for obj in self._iterate_partition(name, chunk_size):
+                    yield obj
+
+            return
+
+        tasks, results, stop = Queue(), Queue(maxsize=chunk_size * workers), threading.Event()
+
+        for name in partitions:
+            tasks.put(name)
+
+        threads = [threading.Thread(target=self._iterate_worker, args=(tasks, results, stop, chunk_size))
+                   for _ in range(min(workers, len(partitions)))]
+
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        finished = 0
+
+        try:
+            while finished < len(threads):
+                kind, value = results.get()
+
+                if kind == 'record':
+                    yield value
+                elif kind == 'error':
+                    raise value
+                else:
+                    finished += 1
+        finally:
+            # Workers stop as soon as they notice that nobody reads records anymore
+            stop.set()
+
+    def _iterate_partition(self, name, chunk_size):
+        """Yields records of the given partition in chunks, every next chunk starts after the last seen primary key"""
+        queryset, last = self.in_partition(name).order_by('pk'), None
+
+        while True:
+            count = 0
+
+            for obj in (queryset if last is None else queryset.filter(pk__gt=last))[:chunk_size].iterator():
+                count, last = count + 1, obj.pk
+                yield obj
+
+            if count < chunk_size:
+                return
+
+    def _iterate_worker(self, tasks, results, stop, chunk_size):
+        """Reads partitions from the tasks queue until it is empty and puts their records to the results queue"""
+        try:
+            while not stop.is_set():
+                try:
+                    name = tasks.get_nowait()
+                except Empty:
+                    break
+
+                for obj in self._iterate_partition(name, chunk_size):
+                    if not self._put_result(results, stop, ('record', obj)):
+                        return
+        except Exception as e:
+            self._put_result(results, stop, ('error', e))
+        finally:
+            connections[self.db].close()
+            self._put_result(results, stop, ('done', None))
+
+    def _put_result(self, results, stop, result):
+        """Puts result to the results queue, gives up if iteration was stopped while the queue is full"""
+        while not stop.is_set():
+            try:
+                results.put(result, timeout=0.1)
+                return True
+            except Full:
+                pass
+
+        return False
+
+
+class PartitionableManager(models.Manager):
+    def get_query_set(self):
+        return PartitionableQuerySet(self.model, using=self._db)
+
+    get_queryset = get_query_set
+
+    def in_partition(self, partition_show):
+        return self.get_query_set().in_partition(partition_show)
+
+    def iterate_partitions(self, partitions=None, chunk_size=1000, workers=1):
+        return self.get_query_set().iterate_partitions(partitions, chunk_size, workers)
+
+    def bulk_create(self, objs, batch_size=None):
+        """
+        Inserts records in batches of multi-row inserts, batches default to 1000 records. Records are read from
+        the given iterable batch by batch, so that memory usage and size of every insert are bounded by the batch
+        size. All partitions needed for the batch are determined in advance and each missing partition is created
+        only once per batch. Returns the given records
+        """
+        using = self._db or router.db_for_write(self.model)
+        batch_size = batch_size or 1000
+        records = iter(objs)
+
+        while True:
+            batch = list(islice(records, batch_size))
+
+            if not batch:
+                break
+
+            partitions = self.model.get_partitions_for([obj.get_partition_value() for obj in batch], using=using)[1]
+
+            for partition in partitions.values():
+                if not partition.exists():
+                    self.model.create_partition(partition)
+
+            # Django 1.4 doesn't split bulk inserts, batch is already bounded for it
+            if django.VERSION < (1, 5):
+                super(PartitionableManager, self).bulk_create(batch)
+            else:
+                super(PartitionableManager, self).bulk_create(batch, batch_size=batch_size)
+
+        return objs
+
+    def copy_from(self, rows, columns=None, batch_size=10000):
+        """
+        Loads records directly into the partitions they belong to, bypassing the per-row routing. Accepts an
+        iterable of model instances or of tuples with values for the given field names, which default to all
+        fields except the auto primary key. Records are grouped by partition in batches, so that memory usage
+        is bounded by the batch size, each batch is loaded in its own transaction. Returns number of records
+        """
+        using = self._db or router.db_for_write(self.model)
+        fields = [self.model._meta.get_field(name) for name in columns] if columns else [
+            field for field in self.model._meta.fields if not isinstance(field, models.AutoField)]
+
+        try:
+            index = [field.name for field in fields].index(self.model._meta.partition_column)
+        except ValueError:
+            raise PartitionColumnError(
+                model=self.model.__name__,
+                current_value=self.model._meta.partition_column,
+                allowed_values=[field.name for field in fields]
+            )
+
+        count, batch = 0, []
+
+        for row in rows:
+            values = [field.pre_save(row, True) for field in fields] if isinstance(row, models.Model) else list(row)
+            batch.append(values)
+
+            if len(batch) >= batch_size:
+                count += self._copy_batch(batch, fields, index, using)
+                batch = []
+
+        if batch:
+            count += self._copy_batch(batch, fields, index, using)
+
+        return count
+
+    def _copy_batch(self, batch, fields, index, using):
+        """Groups batch of records by partition and loads every group into its partition"""
+        connection = connections[using]
+        names, partitions = self.model.get_partitions_for([values[index] for values in batch], using=using)
+        groups = {}
+
+        for name, values in zip(names, batch):
+            groups.setdefault(name, []).append(
+                [field.get_db_prep_save(value, connection=connection) for field, value in zip(fields, values)])
+
+        for name, rows in groups.items():
+            partitions[name].copy([field.column for field in fields], rows)
+
+        transaction.commit_unless_managed(using=using)
+        return len(batch)
+
 
 class Partitionable(models.Model):
-    def get_partition(self):
+    objects = PartitionableManager()
+
+    def get_partition(self, using=None):
+        """Returns partition object for the partition this record belongs to"""
+        return self.get_partition_for(self.get_partition_value(), using=using or router.db_for_write(self.__class__, instance=self))
+
+    def get_partition_value(self):
+        """Returns partition column value of this record as it will be saved"""
         try:
             field = self._meta.get_field(self._meta.partition_column)
-            column_value = field.pre_save(self, self.pk is None)
-            column_type = field.get_internal_type()
+            return field.pre_save(self, self.pk is None)
         except AttributeError:
             raise PartitionColumnError(
                 model=self.__class__.__name__,
@@ -25,23 +240,88 @@ class Partitionable(models.Model):
                 allowed_values=self._meta.get_all_field_names()
             )
 
+    @classmethod
+    def get_partition_for(cls, column_value, using=None):
+        """Returns partition object for the partition the given partition column value belongs to"""
+        using = using or router.db_for_write(cls)
+
+        try:
+            partition_class, column_type = partition_classes[(cls, using)]
+        except KeyError:
+            partition_class, column_type = partition_classes[(cls, using)] = cls._get_partition_class(using)
+
+        return partition_class(column_value, column_type, using=using, **cls._meta.__dict__)
+
+    @classmethod
+    def _get_partition_class(cls, using):
+        """Resolves partition class and partition column type, it is done only once per model and database"""
+        backend = get_backend(using)
+
+        try:
+            column_type = cls._meta.get_field(cls._meta.partition_column).get_internal_type()
+        except AttributeError:
+            raise PartitionColumnError(
+                model=cls.__name__,
+                current_value=cls._meta.partition_column,
+                allowed_values=cls._meta.get_all_field_names()
+            )
+
         try:
-            return getattr(backend.partition, '{0}Partition'.format(
-                self._meta.partition_type.capitalize()))(column_value, column_type, **self._meta.__dict__)
+            return getattr(backend.partition, '{0}Partition'.format(cls._meta.partition_type.capitalize())), column_type
         except AttributeError:
             import re
             raise PartitionTypeError(
-                model=self.__class__.__name__,
-                current_value=self._meta.partition_type,
+                vendor=backend.vendor,
+                model=cls.__name__,
+                current_value=cls._meta.partition_type,
                 allowed_values=[c.replace('Partition', '').lower() for c in dir(
                     backend.partition) if re.match('\w+Partition', c) is not None and 'Base' not in c]
             )
 
+    @classmethod
+    def get_partitions_for(cls, column_values, using=None):
+        """
+        Returns names of the partitions for a batch of partition column values together with partition objects by
+        their names, names are computed for the whole batch at once and a partition object is built once per partition
+        """
+        return cls.get_partition_for(None, using=using).get_partitions_for(list(column_values))
+
+    @classmethod
+    def get_partition_filter(cls, partition_show, using=None):
+        """Returns partition filter object which limits records to the given partition, i.e. current or previous"""
+        backend = get_backend(using or router.db_for_read(cls))
+
+        try:
+            return getattr(backend.filters, '{0}PartitionFilter'.format(
+                cls._meta.partition_type.capitalize()))(partition_show, **cls._meta.__dict__)
+        except AttributeError:
+            import re
+            raise PartitionFilterError(
+                vendor=backend.vendor,
+                model=cls.__name__,
+                current_value=cls._meta.partition_type,
+                allowed_values=[c.replace('PartitionFilter', '').lower() for c in dir(
+                    backend.filters) if re.match('\w+PartitionFilter', c) is not None and 'Base' not in c]
+            )
+
+    @classmethod
+    def get_partitions(cls, using=None):
+        """Returns all existing partitions with their bounds, estimated number of rows, data and index sizes"""
+        return cls.get_partition_for(None, using=using).stats()
+
+    @classmethod
+    def create_partition(cls, partition):
+        """Creates missing partition in the caller's thread or in a background worker depending on the model settings"""
+        if getattr(cls._meta, 'partition_provisioning', 'request') == 'background':
+            provisioner.provision(cls, partition)
+        else:
+            partition.create()
+
     def save(self, *args, **kwargs):
-        partition = self.get_partition()
+        partition = self.get_partition(using=kwargs.get('using'))
 
         if not partition.exists():
-            partition.create()
+            self.create_partition(partition)
 
         super(Partitionable, self).save(*args, **kwargs)
 
@@ -51,3 +331,26 @@ class Partitionable(models.Model):
         partition_subtype = 'None'
         partition_range = 'None'
         partition_column = 'None'
+
+
+def refresh_metadata(**kwargs):
+    """
+    Forgets all known partitions and cached table metadata, should be called every time the database
+    schema of partitioned tables is changed. Called automatically after syncdb and migrations
+    """
+    registry.clear()
+    metadata.clear()
+
+
+try:
+    from django.db.models.signals import post_migrate
+except ImportError:
+    from django.db.models.signals import post_syncdb as post_migrate
+
+post_migrate.connect(refresh_metadata, dispatch_uid='dbparti_refresh_metadata')
+
+try:
+    from south.signals import post_migrate as south_post_migrate
+    south_post_migrate.connect(refresh_metadata, dispatch_uid='dbparti_south_refresh_metadata')
+except ImportError:
+    pass
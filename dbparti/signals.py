@@ -0,0 +1,12 @@
+from django.dispatch import Signal
+
+
+# Sent after every partition operation (prepare, prepare_online, exists, create, drop, migrate, copy) with
+# sender=partition class and arguments: operation, vendor, using, table, partition (name of the partition or
+# None if it can't be determined), duration (seconds), cache_hit (True if the answer came from the registry of
+# known partitions, False if the database was asked, None if no cache was involved) and error (exception or None)
+partition_operation = Signal()
+
+# Sent after every partition filter application with sender=filter class and arguments: vendor, table,
+# partition_show, duration (seconds) and error (exception or None)
+partition_filter_applied = Signal()